@@ -1,16 +1,32 @@
+import time
+
+# Import-time breakdown reported by /api/ready: seconds per stage of importing this module
+_IMPORT_T0 = time.perf_counter()
+IMPORT_BREAKDOWN = {}
+
+
+def _import_mark(stage: str) -> None:
+    IMPORT_BREAKDOWN[stage] = round(time.perf_counter() - _IMPORT_T0 - sum(IMPORT_BREAKDOWN.values()), 4)
+
+
 import os
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Dict
-from fastapi import FastAPI, Query, Request
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
+_import_mark("framework")
+
+# Load .env (once, for every module)
+from .utils.settings import SETTINGS
+from .utils.lazy import lazy_import, import_times
 
-# Load .env
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
+# pandas is only needed by the forecast paths; it loads during warm-up, not at import
+pd = lazy_import("pandas")
 
 # Logging
 LOG_DIR = os.path.join(os.path.dirname(__file__), 'logs')
@@ -78,13 +94,51 @@ DOMAINS = {
 
 # Utilities
 from .notebook_integration import (
-    collect_data, run_sentiment_wrapper, generate_insights_wrapper,
-    forecast_timeseries_wrapper
+    generate_insights_wrapper, ingest_dedup_stats,
+    forecast_timeseries_wrapper, FETCH_CACHE, ingest_jobs, set_relevance_scorer
 )
-from .utils.sentiment import run_sentiment as _run_sent
-from .utils.forecast import save_forecast_chart
+from .utils.sentiment import SENTIMENT_CACHE, preload as preload_sentiment
+from .utils.forecast import cached_forecast_chart, forecast_cache_stats, forecast_batch, preload as preload_forecast
+from .utils.dataset import DomainDataset
+from .utils.resilience import provider_status
+from .utils.llm_client import stream_insights, INSIGHTS_CACHE
+from .utils.store import RecordStore, PROVIDER_KINDS, RECORD_FIELDS
+from .utils.pubsub import Broker, record_topics
+from .utils.scheduler import IngestScheduler
+from .utils.entities import EntityMatcher, load_aliases
+from .utils.dedup import collapse
+from .utils.relevance import RelevanceScorer
+from .utils.http import json_response, encode_cursor, decode_cursor
+from .utils.anomaly import AnomalyDetector
+from .utils.alerts import WebhookDispatcher
+from .utils.metrics import REGISTRY, MetricsMiddleware, SOURCE_TAGS, render as render_metrics
+from .utils.tracing import TracingMiddleware, TracedRoute, span, propagate, slow_requests, SLOW_REQUEST_MS, PROFILE_SAMPLE_RATE
+_import_mark("modules")
+
+DATASET = DomainDataset(DATA_DIR, {slug: meta["competitors"] for slug, meta in DOMAINS.items()})
+
+# Ingested records and the imported domain CSVs; read endpoints serve from here and never
+# call providers themselves
+STORE = RecordStore(os.getenv("STORE_PATH", os.path.join(DATA_DIR, "insightiq.db")))
+INGEST_ENABLED = SETTINGS.get_bool("INGEST_ENABLED", True)
+SCHEDULER = None
+# Competitor names, aliases and tickers; records are tagged with the companies they mention once,
+# when they enter the store, and reads look companies up in the store's index
+MATCHER = EntityMatcher.from_domains(DOMAINS)
+# Live feed: newly stored records are pushed to /api/stream subscribers of their (domain, company) topics
+BROKER = Broker()
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+# Collected and ingested batches are scored against per-domain topic vectors; off-topic items are
+# dropped before sentiment, dedup and storage (RELEVANCE_THRESHOLD)
+set_relevance_scorer(RelevanceScorer.from_domains(DOMAINS, load_aliases()))
+# Sentiment shifts and volume spikes in the ingested streams raise alerts, delivered in batches to
+# SLACK_WEBHOOK_URL (and always appended to logs/alerts.log)
+DETECTOR = AnomalyDetector()
+DISPATCHER = WebhookDispatcher(log_path=os.path.join(LOG_DIR, 'alerts.log'))
 
 app = FastAPI(title="InSightIQ API", version="1.0.0")
+# Sampled requests (PROFILE_SAMPLE_RATE) run their handler under cProfile
+app.router.route_class = TracedRoute
 
 # CORS
 app.add_middleware(
@@ -94,12 +148,222 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route latency histograms for /api/metrics
+app.add_middleware(MetricsMiddleware)
+# Request-scoped spans; slow requests are kept for /api/debug/slow (outermost, so it sees everything)
+app.add_middleware(TracingMiddleware)
+
+_CSV_IMPORT_LOCK = threading.Lock()
+# Imports requested by read paths run here, one at a time, so no request waits for a whole export
+_IMPORT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-import")
+_IMPORT_PENDING = set()
+_IMPORT_PENDING_LOCK = threading.Lock()
+
+
+def archive_current(domain: str) -> bool:
+    """True when the store's archive rows match the domain's export on disk (or there is no export)."""
+    version = DATASET.version(domain)
+    return version is None or STORE.get_meta(f"csv_import:v2:{domain}") == repr(version)
+
+
+def import_domain_csv(domain: str) -> int:
+    """(Re)import a domain CSV (or its Parquet sibling) into the store as archive rows when the file changed."""
+    version = DATASET.version(domain)
+    key = f"csv_import:v2:{domain}"
+    if version is None or STORE.get_meta(key) == repr(version):
+        return 0
+    # warm-up and request paths may both find the CSV changed; import it once
+    with _CSV_IMPORT_LOCK:
+        if STORE.get_meta(key) == repr(version):
+            return 0
+        # batch by batch, so a large export never sits in memory as records all at once; the swap is one
+        # transaction, so readers keep the previous archive rows until the new ones are in
+        recs = (rec for batch in DATASET.records(domain) for rec in MATCHER.tag(dict(r, provider="csv") for r in batch))
+        n = STORE.replace(domain, "archive", recs, key_fields=("link", "date", "source"), meta={key: repr(version)})
+    logger.info("Imported %d archive rows for %s", n, domain)
+    return n
+
+
+def import_domain_csv_soon(domain: str) -> None:
+    """Queue import_domain_csv(domain) in the background unless it is already queued."""
+    with _IMPORT_PENDING_LOCK:
+        if domain in _IMPORT_PENDING:
+            return
+        _IMPORT_PENDING.add(domain)
+
+    def run():
+        try:
+            import_domain_csv(domain)
+        except Exception as e:
+            logger.exception("Background import of %s failed: %s", domain, e)
+        finally:
+            with _IMPORT_PENDING_LOCK:
+                _IMPORT_PENDING.discard(domain)
+    _IMPORT_POOL.submit(run)
+
+
+def store_ingested(domain: str, company: str, provider: str, rows: List[Dict]) -> int:
+    """
+    Scheduler sink: tag rows with the companies they mention, upsert them under the polled company
+    and publish the ones not seen before, as one delta per topic. New records also feed the anomaly
+    detector of every topic they belong to.
+    """
+    new = STORE.upsert(domain, company, MATCHER.tag(rows))
+    deltas: Dict[tuple, list] = {}
+    for r in new:
+        item = {f: r.get(f) for f in RECORD_FIELDS}
+        item["kind"] = PROVIDER_KINDS.get(r.get("provider") or "", "")
+        item["companies"] = r.get("companies") or []
+        for topic in record_topics(domain, company, r):
+            deltas.setdefault(topic, []).append(item)
+            for alert in DETECTOR.observe(topic[0], topic[1], r):
+                DISPATCHER.submit(alert)
+    for topic, items in deltas.items():
+        BROKER.publish(topic, {"domain": topic[0], "company": topic[1], "items": items})
+    return len(new)
+
+
+def _company_filter(company: str) -> Dict[str, str]:
+    """Store filter for a company name: the entity index for known companies, a headline scan otherwise."""
+    if not company or company == "aggregate":
+        return {}
+    known = MATCHER.canonical(company)
+    return {"company": known} if known else {"contains": company.strip()}
+
+
+# Warm-up: heavy imports, the dataset load and the CSV import run after startup, in the background
+# unless WARMUP_BLOCKING is set, so the process answers /api/health at once; /api/ready reports 200
+# only when warm-up has finished
+WARMUP = {"state": "pending", "seconds": None, "steps": {}}
+
+
+def warm_up() -> None:
+    WARMUP["state"] = "running"
+    t_start = time.perf_counter()
+    steps = (
+        ("dataset", DATASET.load_all),
+        ("csv_import", lambda: sum(import_domain_csv(d) for d in DOMAINS)),
+        ("sentiment", preload_sentiment),
+        ("forecast", preload_forecast),
+    )
+    for name, fn in steps:
+        t0 = time.perf_counter()
+        try:
+            step = {"result": fn()}
+        except Exception as e:
+            # a failed step leaves that feature on its lazy/fallback path; it does not block readiness
+            logger.exception("Warm-up step %s failed: %s", name, e)
+            step = {"error": str(e)}
+        step["seconds"] = round(time.perf_counter() - t0, 3)
+        WARMUP["steps"][name] = step
+    WARMUP["seconds"] = round(time.perf_counter() - t_start, 3)
+    WARMUP["state"] = "ready"
+    logger.info("Warm-up finished in %.2fs: %s", WARMUP["seconds"], {k: v["seconds"] for k, v in WARMUP["steps"].items()})
+
+
+@app.on_event("startup")
+def start_warm_up():
+    if SETTINGS.get_bool("WARMUP_BLOCKING", False):
+        warm_up()
+    else:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_ingest():
+    global SCHEDULER
+    if not INGEST_ENABLED:
+        return
+    targets = [(slug, c) for slug, meta in DOMAINS.items() for c in meta["competitors"]]
+    SCHEDULER = IngestScheduler(
+        targets,
+        ingest_jobs(limit=20, on_absorbed=STORE.add_cluster_sizes),
+        sink=store_ingested,
+        quota_share=float(os.getenv("INGEST_QUOTA_SHARE", "0.8")),
+        min_interval=float(os.getenv("INGEST_MIN_INTERVAL_SECONDS", "5")),
+    )
+    SCHEDULER.start()
+
 
-# Health
+@app.on_event("shutdown")
+def stop_ingest():
+    if SCHEDULER is not None:
+        SCHEDULER.stop()
+    DISPATCHER.close()
+
+
+@app.get("/api/ingest/status")
+def ingest_status():
+    return {
+        "enabled": INGEST_ENABLED,
+        "scheduler": SCHEDULER.status() if SCHEDULER is not None else None,
+        "store": STORE.stats(),
+        "dedup": ingest_dedup_stats(),
+        "stream": BROKER.stats(),
+        "alerts": {"detector": DETECTOR.stats(), "webhook": DISPATCHER.stats()},
+    }
+
+# Health: the process is up (liveness)
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
 
+# Readiness: warm-up finished; 503 until then. Includes the import-time breakdown
+@app.get("/api/ready")
+def ready():
+    body = {
+        "ready": WARMUP["state"] == "ready",
+        "warmup": WARMUP,
+        "import_seconds": {"app": IMPORT_BREAKDOWN, "lazy": import_times()},
+    }
+    return body if body["ready"] else JSONResponse(status_code=503, content=body)
+
+# Cache counters
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {"fetch": FETCH_CACHE.stats(), "sentiment": SENTIMENT_CACHE.stats(), "forecast": forecast_cache_stats(), "insights": INSIGHTS_CACHE.stats()}
+
+# Provider rate limiter / circuit breaker state
+@app.get("/api/providers/status")
+def providers_status():
+    return {"providers": provider_status()}
+
+
+# Scrape-time gauges over state the app already keeps
+def _cache_gauge(field: str):
+    def read():
+        caches = {"fetch": FETCH_CACHE, "sentiment": SENTIMENT_CACHE, "insights": INSIGHTS_CACHE}
+        return [({"cache": name}, c.stats()[field]) for name, c in caches.items()]
+    return read
+
+
+_CIRCUIT_STATES = {"closed": 0, "half-open": 1, "open": 2}
+
+REGISTRY.gauge("insightiq_cache_hit_ratio", "Hit ratio per cache (hits, stale hits and coalesced over lookups)",
+               _cache_gauge("hit_ratio"))
+REGISTRY.callback_counter("insightiq_cache_hits_total", "Cache hits since start", _cache_gauge("hits"))
+REGISTRY.callback_counter("insightiq_cache_misses_total", "Cache misses since start", _cache_gauge("misses"))
+REGISTRY.gauge("insightiq_cache_entries", "Entries per cache, including fitted forecast models",
+               lambda: _cache_gauge("size")() + [({"cache": "forecast_models"}, forecast_cache_stats()["models"])])
+REGISTRY.gauge("insightiq_provider_circuit_state", "Circuit breaker state per provider (0 closed, 1 half-open, 2 open)",
+               lambda: [({"provider": p}, _CIRCUIT_STATES.get(s["circuit"], 2)) for p, s in provider_status().items()])
+REGISTRY.gauge("insightiq_provider_rate_tokens", "Rate limiter tokens available per provider",
+               lambda: [({"provider": p}, s["tokens"]) for p, s in provider_status().items()])
+REGISTRY.gauge("insightiq_stream_subscribers", "Open /api/stream subscriptions",
+               lambda: [({}, BROKER.stats()["subscribers"])])
+
+
+# Slow-request timelines (SLOW_REQUEST_MS), newest first, with a cProfile summary when the request was sampled
+@app.get("/api/debug/slow")
+def debug_slow(limit: int = Query(20, ge=1, le=500)):
+    return {"threshold_ms": SLOW_REQUEST_MS, "profile_sample_rate": PROFILE_SAMPLE_RATE, "requests": slow_requests(limit)}
+
+
+# Prometheus text exposition: route, provider and stage latency histograms, source tags, cache gauges
+@app.get("/api/metrics")
+def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Domains
 @app.get("/api/domains")
 def get_domains():
@@ -121,126 +385,335 @@ def get_competitors(domain: str = Query(...)):
     meta = DOMAINS.get(domain)
     if not meta:
         return JSONResponse(status_code=404, content={"error": "unknown domain"})
-    comps = [{"name": c, "logo": f"backend/logos/{domain}/{c.lower().replace(' ', '-')}.png"} for c in meta["competitors"]]
-    return {"domain": domain, "competitors": comps}
+    return {"domain": domain, "competitors": _competitor_list(domain)}
+
+
+def _competitor_list(domain: str):
+    return [{"name": c, "logo": f"backend/logos/{domain}/{c.lower().replace(' ', '-')}.png"} for c in DOMAINS[domain]["competitors"]]
 
 # CSV helper
 
-def _load_domain_csv(domain: str, limit: int = 20):
-    path = os.path.join(DATA_DIR, f"{domain}.csv")
-    if not os.path.exists(path):
-        return [], None
-    df = pd.read_csv(path)
-    # standardize
-    recs = df.sample(min(limit, len(df)), random_state=None).to_dict(orient='records') if len(df) > limit else df.to_dict(orient='records')
-    return recs, path
+def _load_domain_csv(domain: str, limit: int = 20, company: str = ""):
+    # archive rows imported into the store. Until the current export is imported (warm-up, or the file
+    # changed on disk) the file itself is sampled, with the company filter pushed into the scan, and
+    # the import runs in the background
+    with span("csv_fallback", domain=domain) as s:
+        if archive_current(domain):
+            recs = STORE.sample(domain, kind="archive", limit=limit, **_company_filter(company))
+            s["source"] = "store"
+        else:
+            import_domain_csv_soon(domain)
+            recs, _ = DATASET.sample(domain, limit, company="" if company == "aggregate" else company)
+            s["source"] = "file"
+    return recs, (DATASET.path_for(domain) if recs or os.path.exists(DATASET.path_for(domain)) else None)
+
+def _read_archive(domain: str, company: str, limit: int, since: str = None, until: str = None, before=None):
+    # archive rows from the store once the current export is imported; until then the import is queued and
+    # the file is sampled instead (newest first; file rows have no id, so such a page has no next cursor)
+    if archive_current(domain):
+        with span("store.query", kind="archive") as s:
+            items = STORE.query(domain, kind="archive", limit=limit, start=since, end=until, before=before,
+                                **_company_filter(company))
+            s["rows"] = len(items)
+        return items
+    import_domain_csv_soon(domain)
+    if before is not None:
+        # a cursor from an earlier store page: keep to rows up to its date
+        until = min(until or before[0], before[0])
+    with span("csv_fallback", domain=domain) as s:
+        items, _ = DATASET.sample(domain, limit, company="" if company == "aggregate" else company, start=since, end=until)
+        s["source"] = "file"
+    return items
+
+# Store reads with archive (CSV) fallback; limit, date range and the page cursor are pushed down into SQL
+def _read_records(domain: str, company: str, limit: int, kind: str = None, since: str = None, until: str = None,
+                  before=None):
+    flt = _company_filter(company)
+    with span("store.query", kind=kind) as s:
+        items = STORE.query(domain, kind=kind, limit=limit, start=since, end=until, before=before, **flt)
+        s["rows"] = len(items)
+    if items:
+        SOURCE_TAGS.inc(stage=kind or "records", source="store")
+        return {"items": items, "source": "store"}
+    fallback = _read_archive(domain, company, limit, since, until, before)
+    SOURCE_TAGS.inc(stage=kind or "records", source="fallback:csv")
+    return {"items": fallback, "source": "fallback:csv", "csv": DATASET.path_for(domain)}
+
+
+def _page(request: Request, cursor: str, limit: int, read):
+    """
+    Cursor-paginated, conditional list response. `read(before)` returns the page payload; a full
+    page of stored records carries next_cursor for the (date, id) position of its last record. Unchanged pages
+    answer If-None-Match with 304, large ones are compressed.
+    """
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    out = read(before)
+    items = out["items"]
+    full = items and len(items) >= limit and "id" in items[-1]
+    out["next_cursor"] = encode_cursor(items[-1]["date"], items[-1]["id"]) if full else None
+    return json_response(request, out)
 
 # News endpoint
 @app.get("/api/news")
-def api_news(company: str = Query(""), domain: str = Query("ai-ml"), limit: int = Query(20)):
-    try:
-        records, source = collect_data(company=company, domain=domain, limit=limit)
-        if not records:
-            raise Exception("empty")
-        return {"items": records[:limit], "source": source}
-    except Exception:
-        fallback, csv_path = _load_domain_csv(domain, limit)
-        if company:
-            fallback = [r for r in fallback if company.lower() in (r.get("headline", "").lower())]
-        return {"items": fallback[:limit], "source": f"fallback:csv", "csv": csv_path}
-
-# Social endpoint (reuse same as news for now)
+def api_news(request: Request, company: str = Query(""), domain: str = Query("ai-ml"), limit: int = Query(20),
+             since: str = Query(None), until: str = Query(None), cursor: str = Query(None)):
+    return _page(request, cursor, limit, lambda before: _read_records(domain, company, limit, kind="news",
+                                                                      since=since, until=until, before=before))
+
+# Social endpoint
 @app.get("/api/social")
-def api_social(company: str = Query(""), domain: str = Query("ai-ml"), limit: int = Query(20)):
-    try:
-        records, source = collect_data(company=company, domain=domain, limit=limit)
-        if not records:
-            raise Exception("empty")
-        return {"items": records[:limit], "source": source}
-    except Exception:
-        fallback, csv_path = _load_domain_csv(domain, limit)
-        if company:
-            fallback = [r for r in fallback if company.lower() in (r.get("headline", "").lower())]
-        return {"items": fallback[:limit], "source": f"fallback:csv", "csv": csv_path}
-
-# CSV sample for UI
+def api_social(request: Request, company: str = Query(""), domain: str = Query("ai-ml"), limit: int = Query(20),
+               since: str = Query(None), until: str = Query(None), cursor: str = Query(None)):
+    return _page(request, cursor, limit, lambda before: _read_records(domain, company, limit, kind="social",
+                                                                      since=since, until=until, before=before))
+
+# CSV rows for UI: newest archive rows, paged, so repeated polls revalidate instead of re-sampling
 @app.get("/api/csv-sample")
-def csv_sample(domain: str = Query(...), limit: int = Query(20)):
-    recs, path = _load_domain_csv(domain, limit)
-    return {"items": recs[:limit], "csv": path}
+def csv_sample(request: Request, domain: str = Query(...), limit: int = Query(20), cursor: str = Query(None)):
+    def read(before):
+        path = DATASET.path_for(domain)
+        return {"items": _read_archive(domain, "", limit, before=before), "csv": path if os.path.exists(path) else None}
+    return _page(request, cursor, limit, read)
 
 # Forecast endpoint
+def _series(domain: str, company: str):
+    # one averaged point per day, aggregated in SQL: the forecasters average per day anyway
+    pairs = STORE.series(domain, daily=True, **_company_filter(company))
+    if pairs or archive_current(domain):
+        return pd.DataFrame(pairs, columns=["date", "value"])
+    # nothing stored yet and the export not imported: average it per day straight from the file
+    import_domain_csv_soon(domain)
+    with span("series.scan", domain=domain):
+        return DATASET.series(domain, company)
+
+
+def _forecast_items(fdf):
+    return [
+        {"date": str(r.ds)[:10], "yhat": float(r.yhat), "yhat_lower": float(getattr(r, 'yhat_lower', r.yhat)), "yhat_upper": float(getattr(r, 'yhat_upper', r.yhat))}
+        for r in fdf.itertuples(index=False)
+    ]
+
 @app.get("/api/forecast")
-def api_forecast(company: str = Query("aggregate"), days: int = Query(30)):
+def api_forecast(company: str = Query("aggregate"), days: int = Query(30, ge=1, le=365), domain: str = Query("")):
+    return _forecast_payload(company, days, domain)
+
+
+def _forecast_payload(company: str, days: int, domain: str):
     # Create a synthetic time series from CSV sentiment
     # value = rolling average of sentiment_score
     # Fallback if CSV missing
-    used_domain = None
-    for d in DOMAINS.keys():
-        path = os.path.join(DATA_DIR, f"{d}.csv")
-        if os.path.exists(path):
-            used_domain = d
-            break
+    used_domain = domain if domain in DOMAINS else DATASET.first_available(list(DOMAINS.keys()))
     if not used_domain:
+        SOURCE_TAGS.inc(stage="forecast", source="fallback:empty")
         return {"forecast": [], "chart": None, "source": "fallback:empty"}
-    df = pd.read_csv(os.path.join(DATA_DIR, f"{used_domain}.csv"))
-    df = df.sort_values("date")
-    if company and company != "aggregate":
-        df = df[df['headline'].str.contains(company, case=False, na=False)]
-    # Build value column from sentiment_score
-    try:
-        ts = df[["date", "sentiment_score"]].copy()
-        ts["value"] = pd.to_numeric(ts["sentiment_score"], errors='coerce').fillna(0.0)
-        ts = ts[["date", "value"]]
-    except Exception:
-        ts = pd.DataFrame({"date": df.get("date", []), "value": [0.0]*len(df)})
-    fdf, used_prophet = forecast_timeseries_wrapper(ts, days=days)
-    chart_path = os.path.join(STATIC_CHARTS, f"forecast_{company.replace(' ','_')}_{days}.png")
-    save_forecast_chart(fdf, chart_path)
+    ts = _series(used_domain, company)
+    fdf, engine = forecast_timeseries_wrapper(ts, days=days, series_key=f"{used_domain}:{company}")
+    # Charts are named by a hash of the forecast data and rendered off the request thread
+    chart_path, chart_ready = cached_forecast_chart(fdf, STATIC_CHARTS)
     # Convert to JSON-friendly
-    items = [
-        {"date": str(r.ds)[:10], "yhat": float(r.yhat), "yhat_lower": float(getattr(r, 'yhat_lower', r.yhat)), "yhat_upper": float(getattr(r, 'yhat_upper', r.yhat))}
-        for r in fdf.itertuples(index=False)
-    ]
-    return {"forecast": items, "chart": chart_path.replace("\\", "/"), "source": f"forecast:{'prophet' if used_prophet else 'naive'}"}
+    items = _forecast_items(fdf)
+    SOURCE_TAGS.inc(stage="forecast", source=f"forecast:{engine}")
+    return {"forecast": items, "chart": chart_path.replace("\\", "/"), "chart_ready": chart_ready, "source": f"forecast:{engine}"}
+
+# Batch forecast: every competitor in a domain in one vectorized ETS pass
+@app.get("/api/forecast/batch")
+def api_forecast_batch(domain: str = Query(...), days: int = Query(30, ge=1, le=365)):
+    meta = DOMAINS.get(domain)
+    if not meta:
+        return JSONResponse(status_code=404, content={"error": "unknown domain"})
+    series = {c: _series(domain, c) for c in meta["competitors"]}
+    forecasts = forecast_batch(series, days=days)
+    return {
+        "domain": domain,
+        "forecasts": {c: _forecast_items(fdf) for c, fdf in forecasts.items()},
+        "source": "forecast:ets",
+    }
 
 # Insights endpoint
+def _insight_inputs(company: str, domain: str):
+    """(items, source, csv_path) for insights: ingested records first, then the domain CSV.
+    Near-duplicate headlines are collapsed so a syndicated story is summarized once, weighted by its copies."""
+    with span("store.query", kind="news+social") as s:
+        items = STORE.query(domain, kind=("news", "social"), limit=50, **_company_filter(company))
+        s["rows"] = len(items)
+    if items:
+        SOURCE_TAGS.inc(stage="insights", source="store")
+        return collapse(items)[:20], "store", None
+    # Fallback to CSV
+    filtered, path = _load_domain_csv(domain, 50, company=company)
+    SOURCE_TAGS.inc(stage="insights", source="fallback:csv")
+    return collapse(filtered), "fallback:csv", path
+
+
+def _as_score(value) -> float:
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if score != score else score
+
+
+def _sentiment_summary(items):
+    # each story weighs as many copies as were seen of it (cluster_size), not once per representative
+    scored = [(_as_score(it.get("sentiment_score")), int(it.get("cluster_size") or 1))
+              for it in items if it.get("sentiment_score") is not None]
+    mentions = sum(w for _, w in scored)
+    avg = sum(s * w for s, w in scored) / mentions if mentions else 0.0
+    return {"average": round(avg, 3), "count": len(scored), "mentions": mentions}
+
+
 @app.get("/api/insights")
 def api_insights(company: str = Query(...), domain: str = Query("ai-ml")):
-    try:
-        items, source = collect_data(company=company, domain=domain, limit=20)
-        texts = [(it.get("headline") or "") for it in items]
-        insights = generate_insights_wrapper(texts, company=company, domain=domain)
-        # sentiment summary
-        sentiments = [it.get("sentiment_score") for it in items if it.get("sentiment_score") is not None]
-        avg = float(pd.to_numeric(pd.Series(sentiments), errors='coerce').fillna(0.0).mean()) if sentiments else 0.0
-        return {
+    return _insights_payload(company, domain, *_insight_inputs(company, domain))
+
+
+def _insights_payload(company: str, domain: str, items, source, path):
+    texts = [(it.get("headline") or "") for it in items[:20]]
+    insights = generate_insights_wrapper(texts, company=company, domain=domain)
+    out = {
+        "company": company,
+        "domain": domain,
+        "insights": insights,
+        "top_headlines": items[:20],
+        "social_posts": items[:10],
+        "sentiment_summary": _sentiment_summary(items),
+        "source": source,
+    }
+    if path:
+        out["csv"] = path
+    return out
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Streaming insights (Server-Sent Events): a "meta" event with the inputs' summary, then
+# "token" events as the LLM produces text, then "done"
+@app.get("/api/insights/stream")
+def api_insights_stream(company: str = Query(...), domain: str = Query("ai-ml")):
+    def events():
+        items, source, path = _insight_inputs(company, domain)
+        texts = [(it.get("headline") or "") for it in items[:20]]
+        yield _sse("meta", {
             "company": company,
             "domain": domain,
-            "insights": insights,
-            "top_headlines": items,
-            "social_posts": items[:10],
-            "sentiment_summary": {"average": round(avg, 3), "count": len(sentiments)},
+            "sentiment_summary": _sentiment_summary(items),
+            "top_headlines": items[:20],
             "source": source,
-        }
-    except Exception:
-        # Fallback to CSV
-        recs, path = _load_domain_csv(domain, 50)
-        filtered = [r for r in recs if company.lower() in (r.get("headline", "").lower())]
-        texts = [(r.get("headline") or "") for r in filtered[:20]]
-        insights = generate_insights_wrapper(texts, company=company, domain=domain)
-        sentiments = [r.get("sentiment_score") for r in filtered]
-        avg = float(pd.to_numeric(pd.Series(sentiments), errors='coerce').fillna(0.0).mean()) if sentiments else 0.0
-        return {
-            "company": company,
-            "domain": domain,
-            "insights": insights,
-            "top_headlines": filtered[:20],
-            "social_posts": filtered[:10],
-            "sentiment_summary": {"average": round(avg, 3), "count": len(sentiments)},
-            "source": "fallback:csv",
-            "csv": path
-        }
+        })
+        for chunk in stream_insights(texts, company=company, domain=domain):
+            yield _sse("token", {"text": chunk})
+        yield _sse("done", {"source": source})
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Live feed (Server-Sent Events): subscribe to a domain, or one company in it, and receive only newly
+# ingested, sentiment-scored records as "records" events. "reset" means deltas were dropped for a slow
+# client and it should refetch the lists; comment lines keep idle connections open through proxies.
+@app.get("/api/stream")
+async def api_stream(request: Request, domain: str = Query(...), company: str = Query("")):
+    if domain not in DOMAINS:
+        return JSONResponse(status_code=404, content={"error": "unknown domain"})
+    topic = (domain, (MATCHER.canonical(company) or company.strip()) if company else "")
+    sub = BROKER.subscribe(topic)
+
+    async def events():
+        try:
+            yield _sse("ready", {"domain": topic[0], "company": topic[1]})
+            while True:
+                msg = await sub.get(STREAM_KEEPALIVE_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if sub.lagged:
+                    sub.lagged = False
+                    yield _sse("reset", {"domain": topic[0], "company": topic[1]})
+                yield _sse("records", msg) if msg is not None else ": keepalive\n\n"
+        finally:
+            BROKER.unsubscribe(sub)
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Aggregated dashboard: every section computed concurrently from one shared store read
+DASHBOARD_SECTIONS = ("competitors", "csv_sample", "news", "social", "insights", "forecast")
+DASHBOARD_DEADLINE = float(os.getenv("DASHBOARD_DEADLINE_SECONDS", "10"))
+_DASHBOARD_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("DASHBOARD_MAX_WORKERS", "16")), thread_name_prefix="dashboard")
+
+
+def _dashboard_records(domain: str, company: str, limit: int):
+    """One store read shared by the news, social and insights sections: (by_kind, source, csv_path)."""
+    flt = _company_filter(company)
+    items = STORE.query(domain, kind=("news", "social"), limit=max(limit, 50) * 2, **flt)
+    if items:
+        by_kind = {"news": [], "social": []}
+        for it in items:
+            by_kind[PROVIDER_KINDS.get(it.get("provider"), "news")].append(it)
+        return by_kind, "store", None
+    fallback = _read_archive(domain, company, max(limit, 50))
+    return {"news": fallback, "social": fallback}, "fallback:csv", DATASET.path_for(domain)
+
+
+def _timed(fn, name: str = ""):
+    t0 = time.perf_counter()
+    try:
+        with span(f"dashboard.{name}" if name else "dashboard.section"):
+            data = fn()
+        return {"ok": True, "data": data, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+    except Exception as e:
+        logger.exception("Dashboard section failed: %s", e)
+        return {"ok": False, "error": str(e), "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+
+@app.get("/api/dashboard")
+def api_dashboard(domain: str = Query(...), company: str = Query(""), limit: int = Query(10), days: int = Query(30, ge=1, le=365),
+                  sections: str = Query("")):
+    """
+    Everything a dashboard or competitor view needs in one round trip. Sections run concurrently,
+    each reporting its own ok/ms/error; one slow or failing section never blocks the rest past
+    DASHBOARD_DEADLINE_SECONDS. `sections` (comma-separated) restricts the set; insights needs a company.
+    """
+    if domain not in DOMAINS:
+        return JSONResponse(status_code=404, content={"error": "unknown domain"})
+    wanted = [s for s in (sections.split(",") if sections else DASHBOARD_SECTIONS) if s in DASHBOARD_SECTIONS]
+    if not company:
+        wanted = [s for s in wanted if s != "insights"]
+    t0 = time.perf_counter()
+    records = _DASHBOARD_POOL.submit(propagate(_dashboard_records), domain, company, limit) \
+        if {"news", "social", "insights"} & set(wanted) else None
+
+    def feed(kind):
+        by_kind, source, path = records.result()
+        out = {"items": by_kind[kind][:limit], "source": source}
+        if path:
+            out["csv"] = path
+        return out
+
+    def insights():
+        by_kind, source, path = records.result()
+        items = collapse([dict(it) for it in by_kind["news"] + by_kind["social"]]) if source == "store" \
+            else collapse([dict(it) for it in by_kind["news"]])
+        return _insights_payload(company, domain, items[:20], source, path)
+
+    jobs = {
+        "competitors": lambda: _competitor_list(domain),
+        "csv_sample": lambda: {"items": STORE.query(domain, kind="archive", limit=limit)},
+        "news": lambda: feed("news"),
+        "social": lambda: feed("social"),
+        "insights": insights,
+        "forecast": lambda: _forecast_payload(company or "aggregate", days, domain),
+    }
+    futs = {_DASHBOARD_POOL.submit(propagate(_timed), jobs[name], name): name for name in wanted}
+    done, _ = wait(futs, timeout=DASHBOARD_DEADLINE)
+    out = {}
+    for f, name in futs.items():
+        out[name] = f.result() if f in done else {"ok": False, "error": "timeout", "ms": DASHBOARD_DEADLINE * 1000}
+    return {
+        "domain": domain,
+        "company": company,
+        "sections": {name: out[name] for name in wanted},
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
 
 # Alerts webhook
 class AlertPayload(BaseModel):
@@ -259,15 +732,68 @@ def webhook_alerts(payload: AlertPayload):
     logger.info("ALERT: %s", rec["title"])  # console line
     return {"status": "received"}
 
-# Regenerate CSVs
-@app.post("/api/regenerate-csvs")
-def regenerate_csvs():
+# Regenerate CSVs: one background job at a time; POST starts it, GET reports on it
+_REGEN_LOCK = threading.Lock()
+_REGEN_JOB: Dict = {"state": "idle"}
+
+
+def _regenerate_job(params: Dict) -> None:
     from .scripts.generate_csvs import generate_all
-    ok = generate_all()
-    log_path = os.path.join(LOG_DIR, 'data_generation.log')
-    with open(log_path, 'a', encoding='utf-8') as f:
-        f.write("regenerated\n")
-    return {"status": "ok" if ok else "failed"}
+    t0 = time.perf_counter()
+    domains: Dict[str, Dict] = _REGEN_JOB["domains"]
+    error = None
+
+    def progress(stats: Dict) -> None:
+        with _REGEN_LOCK:
+            domains[stats["domain"]] = stats
+
+    try:
+        ok = generate_all(progress=progress, **params)
+        # re-import here so the next request does not pay for it
+        for domain in list(domains):
+            imported = import_domain_csv(domain)
+            with _REGEN_LOCK:
+                domains[domain]["imported"] = imported
+    except Exception as e:
+        logger.exception("CSV regeneration failed: %s", e)
+        ok, error = False, str(e)
+    seconds = round(time.perf_counter() - t0, 2)
+    with _REGEN_LOCK:
+        rows = sum(d.get("rows", 0) for d in domains.values())
+        _REGEN_JOB.update(state="done" if ok else "failed", finished=time.time(), seconds=seconds, error=error)
+    try:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        with open(os.path.join(LOG_DIR, 'data_generation.log'), 'a', encoding='utf-8') as f:
+            f.write(f"regenerated ok={ok} rows={rows} seconds={seconds} params={json.dumps(params)}\n")
+    except OSError as e:
+        logger.warning("Could not append to data_generation.log: %s", e)
+
+
+@app.post("/api/regenerate-csvs", status_code=202)
+def regenerate_csvs(response: Response,
+                    rows: int = Query(100, ge=1, le=5_000_000, description="rows per domain"),
+                    seed: int = Query(1337),
+                    days: int = Query(540, ge=1, le=3650),
+                    parquet: bool = Query(False),
+                    workers: int = Query(None, ge=1)):
+    params = {"rows": rows, "seed": seed, "days": days, "parquet": parquet, "workers": workers}
+    with _REGEN_LOCK:
+        if _REGEN_JOB.get("state") == "running":
+            response.status_code = 409
+            return dict(_REGEN_JOB)
+        _REGEN_JOB.clear()
+        _REGEN_JOB.update(state="running", params=params, started=time.time(), finished=None, seconds=None,
+                          error=None, domains={})
+    threading.Thread(target=_regenerate_job, args=(params,), name="regenerate-csvs", daemon=True).start()
+    return {"state": "running", "params": params}
+
+
+@app.get("/api/regenerate-csvs")
+def regenerate_status():
+    with _REGEN_LOCK:
+        return {**_REGEN_JOB, "domains": dict(_REGEN_JOB.get("domains") or {})}
+
+_import_mark("app")
 
 # Run server for `python backend/app.py`
 if __name__ == "__main__":
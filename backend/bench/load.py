@@ -0,0 +1,215 @@
+"""
+Load test: drive the read endpoints at fixed concurrency levels and report throughput and
+p50/p95/p99 latency per endpoint.
+
+    python -m backend.bench.load --concurrency 1,8,32 --duration 15
+    python -m backend.bench.load --url http://127.0.0.1:8000 --concurrency 16
+
+By default it starts the provider stubs (backend.bench.stubs) and a uvicorn server wired to
+them on a throwaway store, so ingestion and the LLM path run against local stand-ins; with --url
+it targets a server that is already running. Results go to results/load-<timestamp>.json.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import requests
+
+from . import report
+from .stubs import StubServer, add_stub_arguments, configs_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = {
+    "news": ("/api/news", lambda d, c: {"domain": d, "company": c, "limit": 20}),
+    "insights": ("/api/insights", lambda d, c: {"domain": d, "company": c}),
+    "forecast": ("/api/forecast", lambda d, c: {"domain": d, "company": c, "days": 30}),
+    "csv-sample": ("/api/csv-sample", lambda d, c: {"domain": d, "limit": 20}),
+}
+
+
+class AppServer:
+    """uvicorn running backend.app in a subprocess with the given environment."""
+
+    def __init__(self, port: int, env: Dict[str, str], log_path: str):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self._log = open(log_path, "w")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=REPO_ROOT, env={**os.environ, **env}, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float = 180.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise SystemExit(f"server exited with {self.proc.returncode}; see {self._log.name}")
+            try:
+                if requests.get(self.url + "/api/ready", timeout=2, proxies={"http": None}).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        raise SystemExit(f"server not ready after {timeout:.0f}s; see {self._log.name}")
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._log.close()
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_level(base_url: str, urls: Dict[str, str], concurrency: int, duration: float) -> dict:
+    """concurrency closed-loop workers, each cycling through urls until duration elapses."""
+    samples: Dict[str, List[float]] = {name: [] for name in urls}
+    errors: Dict[str, int] = {name: 0 for name in urls}
+    lock = threading.Lock()
+    names = list(urls)
+    start = threading.Barrier(concurrency + 1)
+    stop_at = [0.0]
+
+    def worker(i: int):
+        session = requests.Session()
+        session.trust_env = False  # local target; never through a proxy
+        local = {name: [] for name in names}
+        local_err = {name: 0 for name in names}
+        start.wait()
+        k = i
+        while time.perf_counter() < stop_at[0]:
+            name = names[k % len(names)]
+            k += 1
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(base_url + urls[name], timeout=60).status_code < 400
+            except requests.RequestException:
+                ok = False
+            local[name].append((time.perf_counter() - t0) * 1000)
+            if not ok:
+                local_err[name] += 1
+        with lock:
+            for name in names:
+                samples[name].extend(local[name])
+                errors[name] += local_err[name]
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    t0 = time.perf_counter()
+    stop_at[0] = t0 + duration
+    start.wait()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    endpoints = {name: {**report.summarize(samples[name]), "errors": errors[name]} for name in names}
+    total = sum(len(s) for s in samples.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "overall": report.summarize([x for s in samples.values() for x in s]),
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the InSightIQ read endpoints")
+    parser.add_argument("--url", default=None, help="target an already running server instead of starting one")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of " + ", ".join(ENDPOINTS))
+    parser.add_argument("--domain", default="ai-ml")
+    parser.add_argument("--company", default="OpenAI")
+    parser.add_argument("--ingest-seconds", type=float, default=5.0,
+                        help="when starting a server, let ingestion poll the stubs this long before measuring")
+    parser.add_argument("--out", default=None, help="result file (default results/load-<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier load result file to compare against")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    wanted = [e for e in args.endpoints.split(",") if e]
+    unknown = set(wanted) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    urls = {name: ENDPOINTS[name][0] + "?" + urlencode(ENDPOINTS[name][1](args.domain, args.company)) for name in wanted}
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+
+    stubs = server = None
+    tmp_dir = tempfile.mkdtemp(prefix="insightiq-bench-")
+    try:
+        base_url = args.url
+        if base_url is None:
+            configs = configs_from_args(args)
+            stubs = StubServer(configs=configs).start()
+            env = {
+                **stubs.env(),
+                "STORE_PATH": os.path.join(tmp_dir, "bench.db"),
+                "INGEST_ENABLED": "1",
+                "NO_PROXY": "127.0.0.1,localhost",
+                "INGEST_MIN_INTERVAL_SECONDS": "1",
+                # quotas generous enough that the stubs, not the limiter, set the pace
+                **{f"{p}_QUOTA": "3600/3600" for p in ("GNEWS", "SERPAPI", "TWITTER", "REDDIT")},
+            }
+            server = AppServer(_free_port(), env, os.path.join(tmp_dir, "server.log"))
+            print(f"Starting server on {server.url} (stubs at {stubs.url}) ...", flush=True)
+            server.wait_ready()
+            time.sleep(args.ingest_seconds)
+            base_url = server.url
+        base_url = base_url.rstrip("/")
+
+        levels_out = []
+        for c in levels:
+            res = run_level(base_url, urls, c, args.duration)
+            levels_out.append(res)
+            print(f"\nconcurrency {c}: {res['requests']} requests, {res['throughput_rps']} req/s, {res['errors']} errors")
+            print(report.table(res["endpoints"], ("count", "errors", "p50", "p95", "p99", "max")))
+
+        if args.compare:
+            old = {lvl["concurrency"]: lvl for lvl in report.load(args.compare).get("levels", [])}
+            print(f"\nvs {args.compare}:")
+            for res in levels_out:
+                prev = old.get(res["concurrency"])
+                if prev:
+                    rows = {f"c={res['concurrency']} {n}": r for n, r in res["endpoints"].items()}
+                    base = {f"c={res['concurrency']} {n}": r for n, r in prev["endpoints"].items()}
+                    print("\n".join(report.compare(rows, base)))
+                    print(f"{'c=%d throughput_rps' % res['concurrency']:<40} {prev['throughput_rps']:>10} -> {res['throughput_rps']:>10}")
+
+        payload = {
+            "target": args.url or "spawned",
+            "duration": args.duration,
+            "urls": urls,
+            "stubs": {"config": {p: c.to_dict() for p, c in stubs.configs.items()}, "stats": stubs.stats()} if stubs else None,
+            "levels": levels_out,
+        }
+        path = report.save("load", payload, args.out)
+        print(f"\nSaved {path}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # kept on failure for the server log
+    finally:
+        if server is not None:
+            server.stop()
+        if stubs is not None:
+            stubs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmarks for the hot library paths: sentiment scoring, forecasting and chart rendering.
+
+    python -m backend.bench.micro [--repeat 50] [--only forecast] [--compare results/micro-....json]
+
+Each case is timed `repeat` times after a warm-up call; the summary (ms) is printed and written to
+backend/bench/results/micro-<timestamp>.json.
+"""
+import os
+import gc
+import time
+import argparse
+import tempfile
+import itertools
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utils.sentiment import run_sentiment, run_sentiment_batch, preload as preload_sentiment
+from ..utils.forecast import forecast_timeseries, forecast_batch, save_forecast_chart, _prophet_class
+from . import report
+
+_counter = itertools.count()
+
+
+def _headline(unique: bool) -> str:
+    # unique headlines miss SENTIMENT_CACHE, the fixed one hits it after the warm-up call
+    n = next(_counter) if unique else 0
+    return f"Acme {n} announces record growth after strong quarter but warns on supply delays"
+
+
+def _series(days: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days)
+    values = np.cumsum(rng.normal(0, 0.05, days)) + 0.1 * np.sin(np.arange(days) / 7)
+    return pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "value": values})
+
+
+def cases(tmp_dir: str) -> List[Tuple[str, Callable[[], object]]]:
+    s90, s365 = _series(90), _series(365)
+    many = {f"c{i}": _series(365, seed=i) for i in range(5)}
+    fdf, _ = forecast_timeseries(s365, days=30, engine="ets")
+    out = [
+        ("sentiment.single.cached", lambda: run_sentiment(_headline(False))),
+        ("sentiment.single.uncached", lambda: run_sentiment(_headline(True))),
+        ("sentiment.batch200.uncached", lambda: run_sentiment_batch([_headline(True) for _ in range(200)])),
+        ("forecast.ets.90d", lambda: forecast_timeseries(s90, days=30, engine="ets")),
+        ("forecast.ets.365d", lambda: forecast_timeseries(s365, days=30, engine="ets")),
+        ("forecast.naive.365d", lambda: forecast_timeseries(s365, days=30, engine="naive")),
+        ("forecast.batch.5x365d", lambda: forecast_batch(many, days=30)),
+        ("chart.render", lambda: save_forecast_chart(fdf, os.path.join(tmp_dir, "chart.png"))),
+    ]
+    if _prophet_class() is not None:
+        # background=False and no series_key: every call is a full fit, the cold-path cost
+        out.append(("forecast.prophet.365d.fit", lambda: forecast_timeseries(s365, days=30, engine="prophet", background=False)))
+    return out
+
+
+def run_case(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # warm-up: imports, caches, lazily built state
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return report.summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for sentiment, forecasting and charts")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--only", default="", help="run only cases whose name contains this substring")
+    parser.add_argument("--out", default=None, help="result file (default results/micro-<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier micro result file to compare against")
+    args = parser.parse_args()
+
+    engine = preload_sentiment()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, fn in cases(tmp_dir):
+            if args.only and args.only not in name:
+                continue
+            # the prophet case fits a model per call; a few samples are enough
+            results[name] = run_case(fn, min(args.repeat, 5) if "prophet" in name else args.repeat)
+            print(f"{name:<40} p50 {results[name]['p50']:>9.3f} ms  p95 {results[name]['p95']:>9.3f} ms", flush=True)
+
+    print()
+    print(report.table(results))
+    if args.compare:
+        print(f"\nvs {args.compare}:")
+        print("\n".join(report.compare(results, report.load(args.compare).get("results", {}))) or "(no common cases)")
+    path = report.save("micro", {"sentiment_engine": engine, "repeat": args.repeat, "results": results}, args.out)
+    print(f"\nSaved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """count, mean, min, max and p50/p95/p99 of latency samples in milliseconds."""
+    if not len(samples_ms):
+        return {"count": 0}
+    a = np.asarray(samples_ms, dtype=float)
+    p50, p95, p99 = np.percentile(a, [50, 95, 99])
+    return {"count": int(a.size), "mean": round(float(a.mean()), 3), "min": round(float(a.min()), 3),
+            "p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+            "max": round(float(a.max()), 3)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "commit": _git_commit(), "argv": sys.argv[1:]}
+
+
+def save(kind: str, payload: dict, path: Optional[str] = None) -> str:
+    """Write a result file (results/<kind>-<timestamp>.json unless path is given); returns its path."""
+    payload = {"kind": kind, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), **payload}
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(rows: Dict[str, dict], baseline: Dict[str, dict], metrics: Sequence[str] = ("p50", "p95", "p99")) -> List[str]:
+    """Lines comparing rows with a baseline of the same shape: name, metric, old, new and change in %."""
+    lines = []
+    for name, row in rows.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        for m in metrics:
+            if m in row and m in old and old[m]:
+                change = (row[m] - old[m]) / old[m] * 100
+                lines.append(f"{name:<40} {m:<8} {old[m]:>10.3f} -> {row[m]:>10.3f}  {change:+6.1f}%")
+    return lines
+
+
+def table(rows: Dict[str, dict], columns: Sequence[str] = ("count", "p50", "p95", "p99", "max")) -> str:
+    header = f"{'':<40}" + "".join(f"{c:>10}" for c in columns)
+    lines = [header]
+    for name, row in rows.items():
+        lines.append(f"{name:<40}" + "".join(f"{row.get(c, ''):>10}" for c in columns))
+    return "\n".join(lines)
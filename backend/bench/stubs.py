@@ -0,0 +1,270 @@
+"""
+Local stand-ins for the external providers (GNews, SerpAPI, Twitter, Reddit, OpenAI) and the alert
+webhook (Slack), so load tests never touch the real APIs or spend quota. One threaded HTTP server
+answers every provider under its own path prefix, with configurable latency, error rate and 429
+rate per provider.
+
+    python -m backend.bench.stubs --port 8900 --latency-ms 80 --rate-429 0.02
+
+prints the {PROVIDER}_BASE_URL / OPENAI_BASE_URL / SLACK_WEBHOOK_URL settings that point the backend at it.
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+PROVIDERS = ("gnews", "serpapi", "twitter", "reddit", "openai", "webhook")
+
+VERBS = ["launches", "expands", "partners with", "faces probe over", "delays", "raises funding for",
+         "reports growth in", "cuts prices on", "unveils", "warns about"]
+THINGS = ["new AI model", "data center region", "security update", "developer platform", "chip supply deal",
+          "enterprise offering", "quarterly results", "research lab", "safety framework", "pricing plan"]
+OUTLETS = ["Reuters", "Bloomberg", "TechCrunch", "The Verge", "CNBC", "Wired"]
+
+
+class StubConfig:
+    """Behaviour of one stubbed provider. Latency is latency_ms +/- jitter_ms, uniformly."""
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, retry_after: float = 1.0, items: int = 20):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.items = items
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _headlines(query: str, n: int, seed: int):
+    # Stable per (query, seed) so repeated runs see the same stories
+    rng = random.Random(seed)
+    for i in range(n):
+        yield i, f"{query or 'Tech'} {rng.choice(VERBS)} {rng.choice(THINGS)} - {rng.choice(OUTLETS)}"
+
+
+def _link(kind: str, headline: str) -> str:
+    return f"https://stub.local/{kind}/{hashlib.blake2b(headline.encode(), digest_size=6).hexdigest()}"
+
+
+def _seed(query: str) -> int:
+    # A new batch of stories every minute, like a live feed
+    return int.from_bytes(hashlib.blake2b(f"{query}|{int(time.time() // 60)}".encode(), digest_size=8).digest(), "little")
+
+
+def _gnews(query: str, n: int) -> dict:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"totalArticles": n, "articles": [
+        {"title": h, "publishedAt": now, "url": _link("gnews", h), "source": {"name": h.rsplit(" - ", 1)[-1]}}
+        for _, h in _headlines(query, n, _seed(query))]}
+
+
+def _serpapi(query: str, n: int) -> dict:
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return {"news_results": [
+        {"title": h, "date": today, "link": _link("serp", h), "source": h.rsplit(" - ", 1)[-1]}
+        for _, h in _headlines(query, n, _seed(query) + 1)]}
+
+
+def _twitter(query: str, n: int) -> dict:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return {"data": [{"id": str(10 ** 17 + i), "text": h.rsplit(" - ", 1)[0], "created_at": now, "lang": "en"}
+                     for i, h in _headlines(query, n, _seed(query) + 2)]}
+
+
+def _reddit(query: str, n: int) -> dict:
+    return {"data": {"children": [{"data": {"title": h.rsplit(" - ", 1)[0], "created_utc": time.time(),
+                                            "permalink": f"/r/technology/comments/stub{i}"}}
+                                  for i, h in _headlines(query, n, _seed(query) + 3)]}}
+
+
+def _completion_text() -> str:
+    return ("1. Momentum: coverage is dominated by product launches.\n"
+            "2. Risk: regulatory attention is rising.\n"
+            "3. Opportunity: enterprise demand is growing.")
+
+
+class StubServer:
+    """Threaded HTTP server for all providers; stats() counts requests, errors and 429s per provider."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, configs: Optional[Dict[str, StubConfig]] = None):
+        self.configs = {p: StubConfig() for p in PROVIDERS}
+        self.configs.update(configs or {})
+        self._stats = {p: {"requests": 0, "errors": 0, "rate_limited": 0} for p in PROVIDERS}
+        self._stats["webhook"]["alerts"] = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Settings pointing the backend at this server, with placeholder credentials."""
+        env = {f"{p.upper()}_BASE_URL": f"{self.url}/{p}" for p in ("gnews", "serpapi", "twitter", "reddit")}
+        env["OPENAI_BASE_URL"] = f"{self.url}/openai/v1"
+        env["SLACK_WEBHOOK_URL"] = f"{self.url}/webhook"
+        env.update({"GNEWS_API_KEY": "bench", "SERPAPI_KEY": "bench", "TWITTER_BEARER_TOKEN": "bench",
+                    "OPENAI_API_KEY": "bench"})
+        return env
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="bench-stubs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {p: dict(s) for p, s in self._stats.items()}
+
+    def _count(self, provider: str, field: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[provider][field] += n
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, payload, headers: Optional[dict] = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _dispatch(self, body: Optional[dict] = None):
+                parsed = urlparse(self.path)
+                provider = parsed.path.strip("/").split("/", 1)[0]
+                cfg = server.configs.get(provider)
+                if cfg is None:
+                    return self._send_json(404, {"error": f"unknown provider {provider!r}"})
+                server._count(provider, "requests")
+                time.sleep(max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000.0)
+                roll = random.random()
+                if roll < cfg.rate_429:
+                    server._count(provider, "rate_limited")
+                    return self._send_json(429, {"error": "rate limited"}, {"Retry-After": str(cfg.retry_after)})
+                if roll < cfg.rate_429 + cfg.error_rate:
+                    server._count(provider, "errors")
+                    return self._send_json(500, {"error": "stub failure"})
+                q = parse_qs(parsed.query)
+                query = (q.get("q") or q.get("query") or [""])[0]
+                if provider == "gnews":
+                    return self._send_json(200, _gnews(query, cfg.items))
+                if provider == "serpapi":
+                    return self._send_json(200, _serpapi(query, cfg.items))
+                if provider == "twitter":
+                    return self._send_json(200, _twitter(query, cfg.items))
+                if provider == "reddit":
+                    return self._send_json(200, _reddit(query, cfg.items))
+                if provider == "webhook":
+                    server._count(provider, "alerts", len((body or {}).get("alerts") or []))
+                    return self._send_json(200, {"ok": True})
+                return self._openai(body or {})
+
+            def _openai(self, body: dict):
+                text = _completion_text()
+                if not body.get("stream"):
+                    return self._send_json(200, {
+                        "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for piece in text.split(" "):
+                    chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": body.get("model", "stub"),
+                             "choices": [{"index": 0, "delta": {"content": piece + " "}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def do_GET(self):
+                if self.path.startswith("/_stats"):
+                    return self._send_json(200, server.stats())
+                self._dispatch()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                self._dispatch(body)
+
+        return Handler
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    g = parser.add_argument_group("provider stubs")
+    g.add_argument("--latency-ms", type=float, default=50.0, help="mean stub response latency")
+    g.add_argument("--jitter-ms", type=float, default=20.0, help="uniform +/- jitter around the mean")
+    g.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub responses that are HTTP 500")
+    g.add_argument("--rate-429", type=float, default=0.0, help="fraction of stub responses that are HTTP 429")
+    g.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    g.add_argument("--provider", action="append", default=[], metavar="NAME:KEY=VALUE[,KEY=VALUE]",
+                   help="per-provider override, e.g. gnews:latency_ms=400,rate_429=0.1 (repeatable)")
+
+
+def configs_from_args(args) -> Dict[str, StubConfig]:
+    base = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                rate_429=args.rate_429, retry_after=args.retry_after)
+    configs = {p: StubConfig(**base) for p in PROVIDERS}
+    for spec in args.provider:
+        name, _, settings = spec.partition(":")
+        if name not in configs:
+            raise SystemExit(f"unknown provider {name!r}; expected one of {', '.join(PROVIDERS)}")
+        for kv in filter(None, settings.split(",")):
+            key, _, value = kv.partition("=")
+            if not hasattr(configs[name], key):
+                raise SystemExit(f"unknown stub setting {key!r}")
+            setattr(configs[name], key, type(getattr(configs[name], key))(value))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stand-ins for the external providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server = StubServer(args.host, args.port, configs_from_args(args)).start()
+    for k, v in server.env().items():
+        print(f"{k}={v}")
+    print(f"# stats: {server.url}/_stats  (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
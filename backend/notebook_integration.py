@@ -1,51 +1,153 @@
+from __future__ import annotations
+
 import os
-from typing import List, Tuple
-import pandas as pd
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from .utils.settings import SETTINGS
 
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
+if TYPE_CHECKING:
+    import pandas as pd
 
-from utils.fetchers import (
+from .utils.fetchers import (
     fetch_gnews, fetch_serp_news, fetch_twitter_recent, fetch_reddit_search,
     fetch_finnhub_news, fetch_alphavantage_news,
 )
-from utils.sentiment import run_sentiment
-from utils.forecast import forecast_timeseries, save_forecast_chart
-from utils.llm_client import generate_insights
+from .utils.sentiment import run_sentiment, run_sentiment_batch
+from .utils.forecast import forecast_timeseries, save_forecast_chart
+from .utils.llm_client import generate_insights
+from .utils.cache import TTLCache
+from .utils.dedup import NearDuplicateIndex
+from .utils.relevance import RelevanceScorer
+from .utils.store import link_hash
+from .utils.metrics import SOURCE_TAGS
+from .utils.tracing import span
 
 # NOTEBOOK_INTEGRATION: Safe wrappers informed by notebook logic.
 # TODO: review thresholds, similarity filters, and any experimental parameters in the notebook.
 
 
-def collect_data(company: str = "", domain: str = "", limit: int = 50) -> Tuple[List[dict], str]:
+# Provider responses keyed by (provider, query, limit); ingest jobs polling the same query share them
+FETCH_CACHE = TTLCache(
+    maxsize=int(os.getenv("FETCH_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("FETCH_CACHE_TTL_SECONDS", "120")),
+    stale_ttl=float(os.getenv("FETCH_CACHE_STALE_SECONDS", "600")),
+    name="fetch",
+)
+
+
+# Domain relevance filter applied to every collected batch; the app installs one built from its
+# DOMAINS with set_relevance_scorer(). Without one (or for an unknown domain) nothing is dropped.
+_RELEVANCE: Optional[RelevanceScorer] = None
+
+
+def set_relevance_scorer(scorer: Optional[RelevanceScorer]) -> None:
+    global _RELEVANCE
+    _RELEVANCE = scorer
+
+
+def _relevant(domain: str, rows: List[dict]) -> List[dict]:
+    return _RELEVANCE.filter(domain, rows) if _RELEVANCE is not None and domain else rows
+
+
+def _fetch(fn, query: str, limit: int) -> Tuple[List[dict], str]:
+    """Cached, single-flight provider call. Only non-empty results are cached, so errors,
+    open circuits and rate-limit skips are retried on the next request."""
+    with span("fetch", provider=fn.__name__.replace("fetch_", "")) as s:
+        rows, tag = FETCH_CACHE.get_or_load(
+            (fn.__name__, query, limit),
+            lambda: fn(query=query, limit=limit),
+            cacheable=lambda res: bool(res[0]),
+        )
+        s.update(source=tag, rows=len(rows))
+    SOURCE_TAGS.inc(stage="fetch", source=tag)
+    # callers annotate rows in place; keep the cached copies pristine
+    return [dict(r) for r in rows], tag
+
+
+def _add_sentiment(rows: List[dict]) -> List[dict]:
+    scored = run_sentiment_batch([(r.get("headline") or "") for r in rows])
+    for r, (label, score) in zip(rows, scored):
+        r["sentiment"] = label
+        r["sentiment_score"] = round(float(score), 3)
+    return rows
+
+
+# Provider name (as used for quotas) -> (fetcher, credential env var) for background ingestion
+INGEST_PROVIDERS = {
+    "gnews": (fetch_gnews, "GNEWS_API_KEY"),
+    "serpapi": (fetch_serp_news, "SERPAPI_KEY"),
+    "twitter": (fetch_twitter_recent, "TWITTER_BEARER_TOKEN"),
+    "reddit": (fetch_reddit_search, None),
+}
+
+
+# Recent story representatives per domain, shared by all ingest providers, so a story already
+# stored from one provider is not scored and stored again when another returns it
+INGEST_DEDUP_CAPACITY = int(os.getenv("INGEST_DEDUP_CAPACITY", "5000"))
+_INGEST_SEEN: Dict[str, NearDuplicateIndex] = {}
+# Links already ingested per domain; polls return the same items again and those must not count as copies
+INGEST_SEEN_LINKS = int(os.getenv("INGEST_SEEN_LINKS", "20000"))
+_INGEST_LINKS: Dict[str, "OrderedDict[str, None]"] = {}
+_INGEST_SEEN_LOCK = threading.Lock()
+
+
+def _drop_seen(domain: str, rows: List[dict],
+               on_absorbed: Optional[Callable[[str, Dict[str, int]], None]] = None) -> List[dict]:
     """
-    Attempt to collect data from multiple APIs in sequence. On failures or empty responses, return [].
-    Returns (records, source_tag)
+    Rows that start a new story. A near-duplicate is dropped and its cluster_size added to the
+    representative's: in place when the representative is in this batch (it is stored with the
+    total), through on_absorbed(domain, {link_hash: copies}) when it was stored earlier.
+    Links ingested before are dropped without counting.
     """
-    query = company or domain or "AI technology"
+    keep, absorbed = [], {}
+    with _INGEST_SEEN_LOCK:
+        index = _INGEST_SEEN.get(domain)
+        if index is None:
+            index = _INGEST_SEEN[domain] = NearDuplicateIndex(capacity=INGEST_DEDUP_CAPACITY)
+        links = _INGEST_LINKS.setdefault(domain, OrderedDict())
+        batch = {id(r) for r in rows}
+        for r in rows:
+            h = link_hash(r)
+            if h in links:
+                links.move_to_end(h)
+                continue
+            links[h] = None
+            if len(links) > INGEST_SEEN_LINKS:
+                links.popitem(last=False)
+            rep = index.add(r)
+            if rep is None:
+                keep.append(r)
+            elif id(rep) not in batch:
+                key = link_hash(rep)
+                absorbed[key] = absorbed.get(key, 0) + r["cluster_size"]
+    if absorbed and on_absorbed is not None:
+        on_absorbed(domain, absorbed)
+    return keep
+
+
+def ingest_dedup_stats() -> Dict[str, dict]:
+    with _INGEST_SEEN_LOCK:
+        return {d: {"stories": len(ix), "near_duplicates": ix.duplicates} for d, ix in _INGEST_SEEN.items()}
+
+
+def ingest_jobs(limit: int = 20, on_absorbed: Optional[Callable[[str, Dict[str, int]], None]] = None) -> Dict:
+    """Scheduler jobs, fn(company, domain) -> sentiment-scored records, for every provider with credentials.
+    Off-topic items and near-duplicates of stories recently ingested for the same domain are
+    dropped before scoring; copies of already stored stories are reported to on_absorbed (see _drop_seen)."""
+    jobs = {}
+    for name, (fn, key_env) in INGEST_PROVIDERS.items():
+        if key_env and not SETTINGS.get(key_env):
+            continue
 
-    # try multiple sources in priority order
-    for fn in (fetch_gnews, fetch_serp_news):
-        rows, tag = fn(query=query, limit=limit)
-        if rows:
-            # add basic sentiment
+        def job(company: str, domain: str, fn=fn) -> List[dict]:
+            rows, tag = _fetch(fn, company or domain or "AI technology", limit)
             for r in rows:
-                label, score = run_sentiment((r.get("headline") or ""))
-                r["sentiment"] = label
-                r["sentiment_score"] = round(float(score), 3)
-            return rows, tag
-    # social sources as auxiliary content
-    aux_rows = []
-    for fn in (fetch_twitter_recent, fetch_reddit_search):
-        rows, tag = fn(query=query, limit=min(20, limit))
-        aux_rows.extend(rows)
-    if aux_rows:
-        for r in aux_rows:
-            label, score = run_sentiment((r.get("headline") or ""))
-            r["sentiment"] = label
-            r["sentiment_score"] = round(float(score), 3)
-        return aux_rows, 'api:social'
-    return [], 'api:none'
+                r["provider"] = tag.split(":", 1)[-1]
+            return _add_sentiment(_drop_seen(domain or company, _relevant(domain, rows), on_absorbed))
+        jobs[name] = job
+    return jobs
 
 
 def run_sentiment_wrapper(text: str):
@@ -56,5 +158,5 @@ def generate_insights_wrapper(texts: List[str], company: str = "", domain: str =
     return generate_insights(texts, company=company, domain=domain)
 
 
-def forecast_timeseries_wrapper(df: pd.DataFrame, days: int = 30):
-    return forecast_timeseries(df, days=days)
+def forecast_timeseries_wrapper(df: pd.DataFrame, days: int = 30, series_key: Optional[str] = None):
+    return forecast_timeseries(df, days=days, series_key=series_key)
@@ -1,7 +1,26 @@
 import os
-import csv
-import random
+import sys
+import time
+import zlib
+import argparse
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Parquet output is optional; CSV is always written
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _has_pyarrow = True
+except Exception:
+    _has_pyarrow = False
+
+logger = logging.getLogger("generate_csvs")
 
 DOMAINS = {
     "ai-ml": ["OpenAI","Anthropic","DeepMind","Hugging Face","Stability AI"],
@@ -25,51 +44,306 @@ ADJ_POS = ["surges","expands","announces","partners with","wins","tops","acceler
 ADJ_NEU = ["introduces","files","launches","reports","reveals","updates","mentions","notes","states"]
 ADJ_NEG = ["falls","warns","delays","faces probe","misses","recalls","downgrades","cuts","suffers"]
 
-random.seed(1337)  # deterministic randomness
+TOPICS = ["new platform", "pricing", "partnership", "product line", "earnings", "roadmap", "hiring plans",
+          "expansion", "regulatory filing", "security review", "customer deal", "research results"]
+
+COLUMNS = ["date", "headline", "source", "sentiment", "sentiment_score", "link"]
+
+DEFAULT_SEED = 1337
+DEFAULT_ROWS = 100
+DEFAULT_DAYS = 30 * 18
+CHUNK_ROWS = 250_000
+# Rows are drawn in fixed blocks, each seeded by its block number, and re-sliced into chunk_rows
+# for writing, so the output depends on neither chunk_rows nor the worker count
+GEN_BLOCK_ROWS = 1 << 16
+# Below this many rows in total, domains are generated in-process; process start-up would dominate
+PARALLEL_MIN_ROWS = 200_000
+
+# Sentiment regimes: each company drifts between bullish, neutral and bearish stretches
+REGIME_MEANS = np.array([0.45, 0.0, -0.45])
+REGIME_STAY = 0.97
+SCORE_NOISE = 0.35
+# Share of rows that are syndicated copies of a story published around the same time
+DUPLICATE_RATE = 0.03
+BURST_MAX = 6
+
+
+def _rng(seed: int, slug: str, stream: int) -> np.random.Generator:
+    # Seeded per (seed, domain, stream); streams 100+ are the row blocks (see GEN_BLOCK_ROWS)
+    return np.random.default_rng([seed, zlib.crc32(slug.encode("utf-8")), stream])
+
+
+def _daily_volume(rng: np.random.Generator, days: int, end: date) -> np.ndarray:
+    """Relative volume per day, index 0 = end date: weekday rhythm, growth, seasonality and news events."""
+    d = np.arange(days)
+    weekday = np.array([(end - timedelta(days=int(i))).weekday() for i in range(min(days, 7))])
+    weekday = np.resize(weekday, days)
+    w = np.where(weekday >= 5, 0.45, 1.0)
+    w = w * (1.0 + 0.6 * (1.0 - d / max(days, 1)))
+    w = w * (1.0 + 0.15 * np.sin(2 * np.pi * d / 91.0 + rng.uniform(0, 2 * np.pi)))
+    events = rng.choice(days, size=max(1, days // 30), replace=False)
+    boost = np.zeros(days)
+    for day, size in zip(events, rng.lognormal(1.0, 0.4, len(events))):
+        # a story breaks on `day` and fades over the following days (smaller index = later)
+        for lag in range(4):
+            if day - lag >= 0:
+                boost[day - lag] += size * (0.5 ** lag)
+    return w * (1.0 + boost)
+
+
+def _regimes(rng: np.random.Generator, companies: int, days: int) -> np.ndarray:
+    """Mean sentiment per (company, day) from a persistent three-state Markov chain."""
+    state = rng.integers(0, 3, companies)
+    out = np.empty((companies, days))
+    for day in range(days - 1, -1, -1):
+        switch = rng.random(companies) > REGIME_STAY
+        state = np.where(switch, rng.integers(0, 3, companies), state)
+        out[:, day] = REGIME_MEANS[state]
+    return out
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: stable across processes, unlike hash()
+    x = x.astype(np.uint64)
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
 
 
-def _random_date_within_18_months():
-    days = random.randint(0, 30*18)
-    return (date.today() - timedelta(days=days)).isoformat()
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
 
 
-def _make_row(domain_slug: str) -> dict:
-    company = random.choice(DOMAINS[domain_slug])
-    sentiment_roll = random.random()
-    if sentiment_roll < 0.4:
-        sentiment = "positive"; score = random.uniform(0.21, 1.0); verb = random.choice(ADJ_POS)
-    elif sentiment_roll < 0.8:
-        sentiment = "neutral"; score = random.uniform(-0.2, 0.2); verb = random.choice(ADJ_NEU)
-    else:
-        sentiment = "negative"; score = random.uniform(-1.0, -0.21); verb = random.choice(ADJ_NEG)
+def _hex12(x: np.ndarray) -> np.ndarray:
+    shifts = np.arange(44, -1, -4, dtype=np.uint64)
+    digits = ((x[:, None] >> shifts) & np.uint64(0xF)).astype(np.intp)
+    return _HEX[digits].view("S12").ravel().astype(str)
 
-    headline = f"{company} {verb} in {domain_slug.replace('-', ' ')} market"
+
+def _burst_targets(rng: np.random.Generator, n: int) -> np.ndarray:
+    """
+    (copy, original) row pairs: short runs of rows next to a story become its syndicated copies.
+    Copies may run up to BURST_MAX rows past n, into the next block.
+    """
+    n_bursts = int(n * DUPLICATE_RATE / 2.5)
+    if n_bursts == 0 or n < 16:
+        return np.empty((0, 2), dtype=np.int64)
+    seeds = np.sort(rng.choice(n, size=n_bursts, replace=False))
+    sizes = np.minimum(1 + rng.geometric(0.4, n_bursts), BURST_MAX)
+    origin = np.repeat(seeds, sizes)
+    offset = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes) + 1
+    return np.stack([origin + offset, origin], axis=1)
+
+
+def _block(slug: str, seed: int, start: int, stop: int, cum: np.ndarray, day_str: np.ndarray,
+           regimes: np.ndarray, popularity: np.ndarray, block_no: int,
+           carry: Optional[Dict[str, np.ndarray]] = None) -> Tuple[pd.DataFrame, int, Dict[str, np.ndarray]]:
+    """
+    Rows [start, stop) as block block_no. carry holds the copies the previous block's bursts placed
+    in this one; the copies this block's bursts place in the next are returned the same way.
+    """
+    rng = _rng(seed, slug, 100 + block_no)
+    n = stop - start
+    companies = np.array(DOMAINS[slug], dtype=object)
+    market = slug.replace("-", " ")
+    day = np.searchsorted(cum, np.arange(start, stop), side="right")
+    comp = rng.choice(len(companies), size=n, p=popularity)
+    score = np.clip(regimes[comp, day] + rng.normal(0.0, SCORE_NOISE, n), -1.0, 1.0)
+    label = np.where(score > 0.2, 0, np.where(score < -0.2, 2, 1))
+    verb = rng.integers(0, len(ADJ_POS), n)
+    topic = rng.integers(0, len(TOPICS), n)
+    source = rng.integers(0, len(SOURCES), n)
+    suffix = np.zeros(n, dtype=bool)
+
+    pairs = _burst_targets(rng, n)
+    shift = rng.integers(1, len(SOURCES), len(pairs))
+    inside = pairs[:, 0] < n
+    copy, orig = pairs[inside, 0], pairs[inside, 1]
+    comp[copy], verb[copy], topic[copy], label[copy], score[copy] = comp[orig], verb[orig], topic[orig], label[orig], score[orig]
+    source[copy] = (source[orig] + shift[inside]) % len(SOURCES)
+    suffix[copy] = True
+    orig = pairs[~inside, 1]
+    carry_out = {"pos": pairs[~inside, 0] - n, "comp": comp[orig], "verb": verb[orig], "topic": topic[orig],
+                 "label": label[orig], "score": score[orig], "source": (source[orig] + shift[~inside]) % len(SOURCES)}
+    dups = int(inside.sum())
+    if carry is not None:
+        into = carry["pos"] < n
+        pos = carry["pos"][into]
+        for name, col in (("comp", comp), ("verb", verb), ("topic", topic), ("label", label), ("score", score), ("source", source)):
+            col[pos] = carry[name][into]
+        suffix[pos] = True
+        dups += len(pos)
+
+    verbs = np.array([ADJ_POS, ADJ_NEU, ADJ_NEG], dtype=object)
+    sources = np.array(SOURCES, dtype=object)
+    headline = (pd.Series(companies[comp]) + " " + verbs[label, verb] + " " + np.array(TOPICS, dtype=object)[topic]
+                + f" in {market} market")
+    # syndicated copies carry the publisher attribution, like real feeds do
+    headline[suffix] = headline[suffix] + " - " + sources[source[suffix]]
+    company_slug = np.array([c.lower().replace(" ", "-") for c in DOMAINS[slug]], dtype=object)
+    ids = _hex12(_mix64(np.arange(start, stop, dtype=np.uint64) + np.uint64(zlib.crc32(f"{seed}:{slug}".encode()) << 20)))
+    link = f"https://example.com/{slug}/" + pd.Series(company_slug[comp]) + "/" + ids
+    return pd.DataFrame({
+        "date": day_str[day],
+        "headline": headline.values,
+        "source": sources[source],
+        "sentiment": np.array(["positive", "neutral", "negative"], dtype=object)[label],
+        "sentiment_score": np.round(score, 3),
+        "link": link.values,
+    }, columns=COLUMNS), dups, carry_out
+
+
+def _slices(frames: Iterable[pd.DataFrame], size: int) -> Iterator[pd.DataFrame]:
+    """Re-cut a stream of frames into frames of exactly `size` rows (the last may be shorter)."""
+    buf: List[pd.DataFrame] = []
+    n = 0
+    for df in frames:
+        buf.append(df)
+        n += len(df)
+        while n >= size:
+            cat = buf[0] if len(buf) == 1 else pd.concat(buf, ignore_index=True)
+            yield cat.iloc[:size]
+            rest = cat.iloc[size:]
+            buf, n = ([rest] if len(rest) else []), len(rest)
+    if n:
+        yield buf[0] if len(buf) == 1 else pd.concat(buf, ignore_index=True)
+
+
+def generate_domain(slug: str, out_dir: str, rows: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED,
+                    days: int = DEFAULT_DAYS, end: Optional[str] = None, chunk_rows: int = CHUNK_ROWS,
+                    parquet: bool = False) -> Dict:
+    """
+    Write {slug}.csv (and {slug}.parquet when asked and pyarrow is available), newest rows first,
+    in chunks of chunk_rows (which only sets the write and row-group size, not the data). Files are written under a temporary name and renamed into place, so
+    readers never see a partial file. Returns per-domain stats.
+    """
+    t0 = time.perf_counter()
+    end_day = date.fromisoformat(end) if end else date.today()
+    rng = _rng(seed, slug, 0)
+    volume = _daily_volume(rng, days, end_day)
+    counts = rng.multinomial(rows, volume / volume.sum())
+    cum = np.cumsum(counts)
+    regimes = _regimes(rng, len(DOMAINS[slug]), days)
+    popularity = 1.0 / np.arange(1, len(DOMAINS[slug]) + 1) ** 0.8
+    popularity = rng.permutation(popularity / popularity.sum())
+    day_str = np.array([(end_day - timedelta(days=i)).isoformat() for i in range(days)], dtype=object)
+
+    os.makedirs(out_dir, exist_ok=True)
+    csv_path = os.path.join(out_dir, f"{slug}.csv")
+    pq_path = os.path.join(out_dir, f"{slug}.parquet") if parquet and _has_pyarrow else None
+    csv_tmp = f"{csv_path}.{os.getpid()}.tmp"
+    pq_tmp = f"{pq_path}.{os.getpid()}.tmp" if pq_path else None
+    writer = None
+    duplicates = 0
+
+    def blocks() -> Iterator[pd.DataFrame]:
+        nonlocal duplicates
+        carry = None
+        for b, start in enumerate(range(0, rows, GEN_BLOCK_ROWS)):
+            df, dups, carry = _block(slug, seed, start, min(rows, start + GEN_BLOCK_ROWS), cum, day_str,
+                                     regimes, popularity, b, carry)
+            duplicates += dups
+            yield df
+
+    try:
+        with open(csv_tmp, "w", newline="", encoding="utf-8") as f:
+            for i, df in enumerate(_slices(blocks(), max(chunk_rows, 1))):
+                df.to_csv(f, header=(i == 0), index=False, float_format="%.3f")
+                if pq_tmp:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(pq_tmp, table.schema, compression="zstd")
+                    writer.write_table(table)
+            if rows == 0:
+                f.write(",".join(COLUMNS) + "\n")
+        if writer is not None:
+            writer.close()
+            writer = None
+        os.replace(csv_tmp, csv_path)
+        if pq_tmp and os.path.exists(pq_tmp):
+            os.replace(pq_tmp, pq_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        for tmp in (csv_tmp, pq_tmp):
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
     return {
-        "date": _random_date_within_18_months(),
-        "headline": headline,
-        "source": random.choice(SOURCES),
-        "sentiment": sentiment,
-        "sentiment_score": f"{score:.3f}",
-        "link": f"https://example.com/{domain_slug}/{company.lower().replace(' ', '-')}/{abs(hash(headline)) % 100000}"
+        "domain": slug,
+        "rows": rows,
+        "duplicates": duplicates,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "csv": csv_path,
+        "csv_bytes": os.path.getsize(csv_path),
+        "parquet": pq_path,
     }
 
 
-def generate_all(base_dir: str = None):
-    here = os.path.dirname(os.path.dirname(__file__))  # backend/
-    data_dir = os.path.join(here, 'data')
-    os.makedirs(data_dir, exist_ok=True)
+def generate_all(base_dir: str = None, rows: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED, days: int = DEFAULT_DAYS,
+                 end: Optional[str] = None, workers: Optional[int] = None, parquet: bool = False,
+                 domains: Optional[List[str]] = None, chunk_rows: int = CHUNK_ROWS,
+                 progress: Optional[Callable[[Dict], None]] = None):
+    """
+    Generate every domain's CSV under base_dir (default backend/data). Large jobs run one process per
+    domain (workers, default CPU count); progress(stats) is called as each domain finishes.
+    Returns True when every domain was written.
+    """
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/
+    data_dir = base_dir or os.path.join(here, 'data')
+    slugs = list(domains or DOMAINS)
+    kwargs = dict(rows=rows, seed=seed, days=days, end=end, chunk_rows=chunk_rows, parquet=parquet)
+    if parquet and not _has_pyarrow:
+        logger.warning("pyarrow is not installed; writing CSV only")
+    workers = min(workers or os.cpu_count() or 1, len(slugs))
+    ok = True
+    if workers <= 1 or rows * len(slugs) < PARALLEL_MIN_ROWS:
+        for slug in slugs:
+            try:
+                stats = generate_domain(slug, data_dir, **kwargs)
+            except Exception as e:
+                logger.exception("Generating %s failed: %s", slug, e)
+                ok = False
+                continue
+            if progress:
+                progress(stats)
+        return ok
+    # spawn, not fork: the caller may be a threaded server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futs = {pool.submit(generate_domain, slug, data_dir, **kwargs): slug for slug in slugs}
+        for fut in as_completed(futs):
+            try:
+                stats = fut.result()
+            except Exception as e:
+                logger.exception("Generating %s failed: %s", futs[fut], e)
+                ok = False
+                continue
+            if progress:
+                progress(stats)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic domain CSVs")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="rows per domain")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days of history")
+    parser.add_argument("--end", default=None, help="newest date (YYYY-MM-DD, default today)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel domain processes (default CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--parquet", action="store_true", help="also write {domain}.parquet (needs pyarrow)")
+    parser.add_argument("--domains", default="", help="comma-separated subset of domains")
+    parser.add_argument("--out-dir", default=None, help="output directory (default backend/data)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-    for slug in DOMAINS.keys():
-        rows = [_make_row(slug) for _ in range(100)]
-        rows.sort(key=lambda r: r["date"], reverse=True)
-        path = os.path.join(data_dir, f"{slug}.csv")
-        with open(path, 'w', newline='', encoding='utf-8') as f:
-            w = csv.DictWriter(f, fieldnames=["date","headline","source","sentiment","sentiment_score","link"])
-            w.writeheader()
-            w.writerows(rows)
-    return True
+    t0 = time.perf_counter()
+    ok = generate_all(args.out_dir, rows=args.rows, seed=args.seed, days=args.days, end=args.end,
+                      workers=args.workers, parquet=args.parquet, chunk_rows=args.chunk_rows,
+                      domains=[d for d in args.domains.split(",") if d] or None,
+                      progress=lambda s: print(f"{s['domain']:<22} {s['rows']:>10} rows  {s['duplicates']:>8} dup  {s['seconds']:>7.2f}s", flush=True))
+    print("CSV generation:", "ok" if ok else "failed", f"({time.perf_counter() - t0:.1f}s)")
+    sys.exit(0 if ok else 1)
 
 
 if __name__ == "__main__":
-    ok = generate_all()
-    print("CSV generation:", "ok" if ok else "failed")
+    main()
@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from .settings import SETTINGS
+from .resilience import ProviderUnavailable, RetryLater
+from .fetchers import _provider_request
+
+logger = logging.getLogger("alerts")
+
+# Alerts raised during ingestion are queued and delivered in batches by one background thread,
+# so a slow or failing webhook never holds up the ingest workers. Every alert is also appended
+# to logs/alerts.log, the same file /api/webhook/alerts writes.
+
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", "20"))
+ALERT_FLUSH_SECONDS = float(os.getenv("ALERT_FLUSH_SECONDS", "5"))
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+# Delivery attempts per batch across flushes; each attempt is a single webhook request
+ALERT_MAX_ATTEMPTS = int(os.getenv("ALERT_MAX_ATTEMPTS", "5"))
+
+SEVERITY_ICONS = {"critical": ":rotating_light:", "warning": ":warning:"}
+
+
+def webhook_body(alerts: List[dict]) -> dict:
+    """Slack incoming-webhook message for a batch; the structured alerts ride along under "alerts"."""
+    lines = [f"{SEVERITY_ICONS.get(a.get('severity'), ':information_source:')} *{a['title']}*: {a['message']}" for a in alerts]
+    return {"text": "\n".join(lines), "alerts": alerts}
+
+
+class WebhookDispatcher:
+    """
+    Batched, retrying delivery to a webhook URL (SLACK_WEBHOOK_URL by default). submit() never
+    blocks; a batch goes out when ALERT_BATCH_SIZE alerts are waiting or ALERT_FLUSH_SECONDS after
+    the first of them. Failed batches are retried on later flushes, up to ALERT_MAX_ATTEMPTS. When the
+    queue is full the oldest alerts are dropped. Without a URL alerts are only logged.
+    """
+
+    def __init__(self, url: Optional[str] = None, log_path: Optional[str] = None, batch_size: int = ALERT_BATCH_SIZE,
+                 flush_seconds: float = ALERT_FLUSH_SECONDS, max_attempts: int = ALERT_MAX_ATTEMPTS,
+                 queue_size: int = ALERT_QUEUE_SIZE):
+        self.url = url if url is not None else SETTINGS.get("SLACK_WEBHOOK_URL")
+        self.log_path = log_path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+        self._queue: deque = deque(maxlen=queue_size)
+        self._retry: Optional[List[dict]] = None
+        self._attempts = 0
+        self._retry_delay = 0.0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self.counts = {"submitted": 0, "delivered": 0, "batches": 0, "failed_attempts": 0, "dropped": 0}
+
+    def submit(self, alert: dict) -> None:
+        alert = {**alert, "ts": alert.get("ts") or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        self._log(alert)
+        if not self.url:
+            return
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.counts["dropped"] += 1
+            self._queue.append(alert)
+            self.counts["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def _log(self, alert: dict) -> None:
+        logger.warning("ALERT [%s] %s: %s", alert.get("severity"), alert.get("title"), alert.get("message"))
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(alert, default=str) + "\n")
+        except OSError as e:
+            logger.warning("Could not append to %s: %s", self.log_path, e)
+
+    def _next_batch(self) -> Optional[List[dict]]:
+        with self._cond:
+            if self._retry is None:
+                # wait for a full batch, the flush interval, or shutdown
+                deadline = time.monotonic() + self.flush_seconds
+                while len(self._queue) < self.batch_size and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            else:
+                # back off between attempts at a failed batch
+                self._cond.wait_for(lambda: self._closing, timeout=max(self.flush_seconds, self._retry_delay))
+            if self._retry is not None:
+                return self._retry
+            if not self._queue:
+                return None
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._retry, self._attempts = batch, 0
+            return batch
+
+    def _deliver(self, batch: List[dict]) -> bool:
+        try:
+            _provider_request("POST", self.url, json=webhook_body(batch), provider="webhook")
+            return True
+        except RetryLater as e:
+            self._retry_delay = e.delay
+            logger.info("Alert webhook retrying in %.1fs", e.delay)
+        except ProviderUnavailable as e:
+            logger.info("Alert webhook skipped: %s", e.reason)
+        except Exception as e:
+            logger.warning("Alert webhook delivery failed: %s", e)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                if self._closing:
+                    return
+                continue
+            ok = self._deliver(batch)
+            with self._cond:
+                self._attempts += 1
+                if ok:
+                    self.counts["delivered"] += len(batch)
+                    self.counts["batches"] += 1
+                else:
+                    self.counts["failed_attempts"] += 1
+                # shutting down: one attempt per batch, no backoff
+                if ok or self._attempts >= self.max_attempts or self._closing:
+                    if not ok:
+                        self.counts["dropped"] += len(batch)
+                        logger.error("Dropping %d alerts after %d failed deliveries", len(batch), self._attempts)
+                    self._retry = None
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush what is queued (best effort, within timeout) and stop the thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {"url_configured": bool(self.url), "queued": len(self._queue),
+                    "retrying": len(self._retry or ()), **self.counts}
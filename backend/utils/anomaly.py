@@ -0,0 +1,198 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger("anomaly")
+
+# Incremental anomaly detection over ingested records. Every (domain, company) stream keeps a few
+# running numbers and nothing else: a fast and a slow EWMA of sentiment (with the slow one's
+# variance) and an EWMA of arrivals per time bucket. observe() is constant work per record,
+# whatever the history length.
+
+SENTIMENT_ALPHA_FAST = float(os.getenv("ANOMALY_ALPHA_FAST", "0.3"))
+SENTIMENT_ALPHA_SLOW = float(os.getenv("ANOMALY_ALPHA_SLOW", "0.02"))
+SENTIMENT_MIN_STD = float(os.getenv("ANOMALY_MIN_STD", "0.05"))
+VOLUME_ALPHA = float(os.getenv("ANOMALY_VOLUME_ALPHA", "0.1"))
+VOLUME_BUCKET_SECONDS = float(os.getenv("VOLUME_BUCKET_SECONDS", "300"))
+VOLUME_MIN_COUNT = int(os.getenv("VOLUME_MIN_COUNT", "5"))
+# No alerts until a stream has this much baseline
+ANOMALY_MIN_RECORDS = int(os.getenv("ANOMALY_MIN_RECORDS", "50"))
+ANOMALY_MIN_BUCKETS = int(os.getenv("ANOMALY_MIN_BUCKETS", "6"))
+Z_WARNING = float(os.getenv("ANOMALY_Z_WARNING", "3.5"))
+Z_CRITICAL = float(os.getenv("ANOMALY_Z_CRITICAL", "5"))
+# The same alert (stream, kind, direction) is raised again only after this long, or if it got worse
+ALERT_COOLDOWN_SECONDS = float(os.getenv("ALERT_COOLDOWN_SECONDS", "1800"))
+
+SEVERITY_RANK = {"warning": 1, "critical": 2}
+
+ALERTS_RAISED = REGISTRY.counter("insightiq_alerts_total", "Anomaly alerts raised, after deduplication", ("kind", "severity"))
+ALERTS_SUPPRESSED = REGISTRY.counter("insightiq_alerts_suppressed_total", "Anomaly alerts dropped as repeats", ("kind",))
+
+
+def severity(z: float) -> Optional[str]:
+    z = abs(z)
+    if z >= Z_CRITICAL:
+        return "critical"
+    if z >= Z_WARNING:
+        return "warning"
+    return None
+
+
+class SentimentStats:
+    """
+    EWMA control chart on sentiment scores. The fast EWMA tracks the recent level, the slow one the
+    baseline mean and variance; z is the fast level's distance from the baseline in units of the
+    fast EWMA's own standard deviation, sigma * sqrt(a / (2 - a)).
+    """
+
+    __slots__ = ("n", "fast", "mean", "var")
+
+    def __init__(self):
+        self.n = 0
+        self.fast = self.mean = self.var = 0.0
+
+    def update(self, x: float) -> float:
+        """Add one score; returns the z-score of the recent level against the baseline before x."""
+        if self.n == 0:
+            self.n, self.fast, self.mean = 1, x, x
+            return 0.0
+        self.n += 1
+        self.fast += SENTIMENT_ALPHA_FAST * (x - self.fast)
+        std = max(math.sqrt(self.var), SENTIMENT_MIN_STD)
+        z = (self.fast - self.mean) / (std * math.sqrt(SENTIMENT_ALPHA_FAST / (2 - SENTIMENT_ALPHA_FAST)))
+        # exponentially weighted mean and variance (West's incremental form)
+        diff = x - self.mean
+        incr = SENTIMENT_ALPHA_SLOW * diff
+        self.mean += incr
+        self.var = (1 - SENTIMENT_ALPHA_SLOW) * (self.var + diff * incr)
+        return z
+
+
+class VolumeStats:
+    """Arrivals per VOLUME_BUCKET_SECONDS bucket against an EWMA of past buckets' counts."""
+
+    __slots__ = ("bucket", "count", "buckets", "mean", "var")
+
+    # Quiet gaps longer than this many buckets are folded in as this many empty buckets
+    MAX_GAP = 64
+
+    def __init__(self):
+        self.bucket: Optional[int] = None
+        self.count = 0
+        self.buckets = 0
+        self.mean = self.var = 0.0
+
+    def _push(self, count: float) -> None:
+        if self.buckets == 0:
+            self.mean = count
+        else:
+            diff = count - self.mean
+            incr = VOLUME_ALPHA * diff
+            self.mean += incr
+            self.var = (1 - VOLUME_ALPHA) * (self.var + diff * incr)
+        self.buckets += 1
+
+    def update(self, now: float) -> float:
+        """Count one arrival at `now`; returns the current bucket's z-score against past buckets."""
+        b = int(now // VOLUME_BUCKET_SECONDS)
+        if self.bucket is None:
+            self.bucket = b
+        elif b > self.bucket:
+            self._push(self.count)
+            for _ in range(min(b - self.bucket - 1, self.MAX_GAP)):
+                self._push(0)
+            self.bucket, self.count = b, 0
+        self.count += 1
+        # arrivals are roughly Poisson, so the spread is at least sqrt(mean) even when past buckets agreed
+        return (self.count - self.mean) / max(math.sqrt(self.var), math.sqrt(self.mean), 1.0)
+
+
+class AnomalyDetector:
+    """
+    Per-stream sentiment-shift and volume-spike detection with alert deduplication.
+    observe() takes one ingested record and returns the alerts it triggered (usually none), each
+    shaped like the /api/webhook/alerts payload: {title, severity, message, meta}.
+    """
+
+    def __init__(self, cooldown: float = ALERT_COOLDOWN_SECONDS):
+        self.cooldown = cooldown
+        self._sentiment: Dict[Tuple[str, str], SentimentStats] = {}
+        self._volume: Dict[Tuple[str, str], VolumeStats] = {}
+        self._last: Dict[Tuple[str, str, str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self.observed = 0
+        self.raised = 0
+        self.suppressed = 0
+
+    def observe(self, domain: str, company: str, record: dict, now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+        key = (domain, company)
+        alerts = []
+        with self._lock:
+            self.observed += 1
+            score = record.get("sentiment_score")
+            if score is not None:
+                stats = self._sentiment.get(key)
+                if stats is None:
+                    stats = self._sentiment[key] = SentimentStats()
+                z = stats.update(float(score))
+                if stats.n > ANOMALY_MIN_RECORDS and severity(z):
+                    alerts.append(self._sentiment_alert(domain, company, stats, z, record))
+            vol = self._volume.get(key)
+            if vol is None:
+                vol = self._volume[key] = VolumeStats()
+            z = vol.update(now)
+            if vol.buckets >= ANOMALY_MIN_BUCKETS and vol.count >= VOLUME_MIN_COUNT and z > 0 and severity(z):
+                alerts.append(self._volume_alert(domain, company, vol, z))
+            return [a for a in alerts if self._admit(a, now)]
+
+    def _admit(self, alert: dict, now: float) -> bool:
+        meta = alert["meta"]
+        key = (meta["domain"], meta["company"], meta["kind"], meta["direction"])
+        rank = SEVERITY_RANK[alert["severity"]]
+        last = self._last.get(key)
+        if last is not None and now - last[0] < self.cooldown and rank <= last[1]:
+            self.suppressed += 1
+            ALERTS_SUPPRESSED.inc(kind=meta["kind"])
+            return False
+        self._last[key] = (now, rank)
+        self.raised += 1
+        ALERTS_RAISED.inc(kind=meta["kind"], severity=alert["severity"])
+        return True
+
+    @staticmethod
+    def _sentiment_alert(domain: str, company: str, stats: SentimentStats, z: float, record: dict) -> dict:
+        direction = "negative" if z < 0 else "positive"
+        subject = company or domain
+        return {
+            "title": f"{subject}: {direction} sentiment shift",
+            "severity": severity(z),
+            "message": (f"Recent sentiment for {subject} averages {stats.fast:+.2f} against a baseline of "
+                        f"{stats.mean:+.2f} (z={z:+.1f}). Latest: {record.get('headline') or ''}"),
+            "meta": {"kind": "sentiment_shift", "direction": direction, "domain": domain, "company": company,
+                     "z": round(z, 2), "recent": round(stats.fast, 3), "baseline": round(stats.mean, 3),
+                     "records": stats.n, "link": record.get("link")},
+        }
+
+    @staticmethod
+    def _volume_alert(domain: str, company: str, vol: VolumeStats, z: float) -> dict:
+        subject = company or domain
+        return {
+            "title": f"{subject}: coverage volume spike",
+            "severity": severity(z),
+            "message": (f"{vol.count} new items for {subject} in the current {VOLUME_BUCKET_SECONDS:.0f}s window "
+                        f"against a typical {vol.mean:.1f} (z={z:+.1f})."),
+            "meta": {"kind": "volume_spike", "direction": "up", "domain": domain, "company": company,
+                     "z": round(z, 2), "count": vol.count, "baseline": round(vol.mean, 2),
+                     "bucket_seconds": VOLUME_BUCKET_SECONDS},
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"streams": len(self._volume), "observed": self.observed, "raised": self.raised,
+                    "suppressed": self.suppressed}
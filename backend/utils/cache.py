@@ -0,0 +1,121 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger("cache")
+
+# Shared pool for stale-while-revalidate refreshes
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry TTL.
+    - Fresh entries (younger than ttl) are returned directly.
+    - Stale entries (younger than ttl + stale_ttl) are returned immediately while one
+      background refresh reloads them (stale-while-revalidate).
+    - Concurrent misses for the same key share a single loader call (single-flight).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, stale_ttl: float = 0.0, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, stored_at)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Fresh value for key, without loading."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value for key or call loader() once for all concurrent callers."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[1]
+                if age < self.ttl:
+                    self.hits += 1
+                    self._data.move_to_end(key)
+                    return entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._data.move_to_end(key)
+                    if key not in self._inflight:
+                        fut = self._inflight[key] = Future()
+                        _REFRESH_POOL.submit(self._load, key, loader, fut, cacheable)
+                    return entry[0]
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+                leader = True
+        if leader:
+            self._load(key, loader, fut, cacheable)
+        return fut.result()
+
+    def _load(self, key, loader, fut: Future, cacheable) -> None:
+        try:
+            value = loader()
+        except BaseException as e:
+            logger.warning("%s: load failed for %r: %s", self.name, key, e)
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+
+    def _store(self, key, value) -> None:
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.stale_hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
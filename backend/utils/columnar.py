@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import os
+import logging
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+# Parquet storage is optional; without pyarrow every read streams the CSV in chunks
+try:
+    import pyarrow.parquet as pq
+    _has_pyarrow = True
+except Exception:
+    _has_pyarrow = False
+
+logger = logging.getLogger("columnar")
+
+# Streaming reads over domain exports. A read names the columns it needs and the rows it wants
+# (date range, sentiment labels, score range, headline substring); only those columns are decoded,
+# Parquet row groups whose statistics rule the predicate out are never read, and rows come back in
+# bounded batches, so memory follows the batch size and the result, not the file.
+
+COLUMNS = ["date", "headline", "source", "sentiment", "sentiment_score", "link"]
+BATCH_ROWS = int(os.getenv("COLUMNAR_BATCH_ROWS", "100000"))
+
+
+def storage_path(csv_path: str) -> Optional[str]:
+    """
+    The file to read for a domain export: its .parquet sibling when pyarrow is installed and the
+    Parquet file is at least as new as the CSV, else the CSV. None when neither exists.
+    """
+    pq_path = os.path.splitext(csv_path)[0] + ".parquet"
+    csv_mtime = _mtime(csv_path)
+    if _has_pyarrow:
+        pq_mtime = _mtime(pq_path)
+        if pq_mtime is not None and (csv_mtime is None or pq_mtime >= csv_mtime):
+            return pq_path
+    return csv_path if csv_mtime is not None else None
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class Predicate:
+    """Row filter for scan(). Dates are inclusive ISO days; an empty predicate keeps every row."""
+
+    __slots__ = ("start", "end", "sentiments", "min_score", "max_score", "contains")
+
+    def __init__(self, start: Optional[str] = None, end: Optional[str] = None,
+                 sentiments: Optional[Sequence[str]] = None, min_score: Optional[float] = None,
+                 max_score: Optional[float] = None, contains: str = ""):
+        self.start = start[:10] if start else None
+        self.end = end[:10] if end else None
+        self.sentiments = [s.lower() for s in sentiments] if sentiments else None
+        self.min_score = min_score
+        self.max_score = max_score
+        self.contains = contains.lower()
+
+    def columns(self) -> List[str]:
+        cols = []
+        if self.start or self.end:
+            cols.append("date")
+        if self.sentiments:
+            cols.append("sentiment")
+        if self.min_score is not None or self.max_score is not None:
+            cols.append("sentiment_score")
+        if self.contains:
+            cols.append("headline")
+        return cols
+
+    def skips(self, stats: dict) -> bool:
+        """True when column min/max statistics ({column: (min, max)}) prove no row can match."""
+        lo, hi = stats.get("date", (None, None))
+        if lo is not None and ((self.end and str(lo)[:10] > self.end) or (self.start and str(hi)[:10] < self.start)):
+            return True
+        lo, hi = stats.get("sentiment_score", (None, None))
+        if lo is not None and ((self.min_score is not None and hi < self.min_score)
+                               or (self.max_score is not None and lo > self.max_score)):
+            return True
+        lo, hi = stats.get("sentiment", (None, None))
+        if lo is not None and self.sentiments and lo == hi and str(lo).lower() not in self.sentiments:
+            return True
+        return False
+
+    def mask(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """Boolean row mask for a normalized batch; None when everything matches."""
+        keep = None
+
+        def both(m):
+            return m if keep is None else keep & m
+
+        if self.start:
+            keep = both(frame["date"].values >= self.start)
+        if self.end:
+            keep = both(frame["date"].values <= self.end)
+        if self.sentiments:
+            keep = both(frame["sentiment"].isin(self.sentiments).values)
+        if self.min_score is not None:
+            keep = both((frame["sentiment_score"] >= self.min_score).values)
+        if self.max_score is not None:
+            keep = both((frame["sentiment_score"] <= self.max_score).values)
+        if self.contains:
+            keep = both(frame["headline"].str.contains(self.contains, case=False, regex=False).values)
+        return keep
+
+
+def _normalize(frame: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    # One in-batch representation for both formats: ISO day strings, float scores, "" for missing text
+    for col in columns:
+        if col not in frame.columns:
+            frame[col] = np.nan if col == "sentiment_score" else ""
+    frame = frame[columns]
+    if "date" in columns:
+        dates = frame["date"].astype(str)
+        # timestamps are cut to their day; plain ISO days (the usual case) are left as they are
+        if len(dates) and max(map(len, dates.values)) > 10:
+            dates = dates.str.slice(0, 10)
+        frame = frame.assign(date=dates)
+    if "sentiment_score" in columns:
+        frame = frame.assign(sentiment_score=pd.to_numeric(frame["sentiment_score"], errors="coerce").astype("float64"))
+    for col in ("headline", "source", "sentiment", "link"):
+        if col in columns and frame[col].dtype != object:
+            frame = frame.assign(**{col: frame[col].astype(str)})
+    return frame
+
+
+def _csv_batches(path: str, columns: List[str], batch_rows: int) -> Iterator[pd.DataFrame]:
+    wanted = set(columns)
+    reader = pd.read_csv(path, usecols=lambda c: c in wanted, dtype=str, keep_default_na=False,
+                         chunksize=batch_rows)
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _row_group_stats(meta, i: int, names: List[str]) -> dict:
+    out = {}
+    rg = meta.row_group(i)
+    for j in range(rg.num_columns):
+        col = rg.column(j)
+        name = col.path_in_schema
+        st = col.statistics
+        if name in names and st is not None and st.has_min_max:
+            out[name] = (st.min, st.max)
+    return out
+
+
+def _parquet_batches(path: str, columns: List[str], pred: Predicate, batch_rows: int) -> Iterator[pd.DataFrame]:
+    pf = pq.ParquetFile(path)
+    present = [c for c in columns if c in pf.schema_arrow.names]
+    filters = pred.columns()
+    groups = [i for i in range(pf.metadata.num_row_groups)
+              if not pred.skips(_row_group_stats(pf.metadata, i, filters))]
+    skipped = pf.metadata.num_row_groups - len(groups)
+    if skipped:
+        logger.debug("%s: skipped %d of %d row groups", path, skipped, pf.metadata.num_row_groups)
+    if not groups:
+        return
+    for batch in pf.iter_batches(batch_size=batch_rows, row_groups=groups, columns=present):
+        yield batch.to_pandas()
+
+
+def scan(path: str, columns: Optional[Sequence[str]] = None, predicate: Optional[Predicate] = None,
+         batch_rows: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Stream the matching rows of a CSV or Parquet export as DataFrames of at most batch_rows rows,
+    holding only `columns` (default all). Dates are ISO day strings and sentiment_score is float.
+    """
+    pred = predicate or Predicate()
+    columns = list(columns or COLUMNS)
+    # date is always decoded: rows without one are dropped, as the in-memory tables do
+    needed = list(dict.fromkeys(columns + ["date"] + pred.columns()))
+    if path.endswith(".parquet"):
+        batches = _parquet_batches(path, needed, pred, batch_rows)
+    else:
+        batches = _csv_batches(path, needed, batch_rows)
+    for raw in batches:
+        frame = _normalize(raw, needed)
+        keep = pred.mask(frame)
+        dated = frame["date"].values != ""
+        keep = dated if keep is None else keep & dated
+        if not keep.all():
+            frame = frame[keep]
+        if len(frame):
+            yield frame[columns].reset_index(drop=True)
+
+
+def reservoir_sample(batches: Iterable[pd.DataFrame], k: int, rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """
+    Uniform sample of k rows from a stream of batches in one pass (Algorithm R, vectorized per
+    batch). Holds at most k rows plus the current batch; rows keep their stream order.
+    """
+    rng = rng or np.random.default_rng()
+    kept: Optional[pd.DataFrame] = None
+    order = np.empty(0, dtype=np.int64)  # stream position of each kept row
+    seen = 0
+    for batch in batches:
+        n = len(batch)
+        if kept is None:
+            kept = batch.iloc[:0]
+        if k <= 0 or n == 0:
+            seen += n
+            continue
+        first = min(k - len(kept), n)
+        if first:
+            kept = pd.concat([kept, batch.iloc[:first]], ignore_index=True)
+            order = np.concatenate([order, seen + np.arange(first)])
+        rest = n - first
+        if rest:
+            # the row at stream position p replaces a uniform slot in [0, p] when that slot is < k
+            pos = seen + first + np.arange(rest)
+            slot = (rng.random(rest) * (pos + 1)).astype(np.int64)
+            hit = np.flatnonzero(slot < k)
+            if len(hit):
+                # a slot hit twice in one batch ends up holding the later row
+                slots, last = np.unique(slot[hit][::-1], return_index=True)
+                take = first + hit[::-1][last]
+                kept = kept.copy()
+                for col in kept.columns:
+                    values = kept[col].to_numpy(copy=True)
+                    values[slots] = batch[col].to_numpy()[take]
+                    kept[col] = values
+                order[slots] = seen + take
+        seen += n
+    if kept is None:
+        return pd.DataFrame()
+    return kept.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+
+
+def daily_mean(batches: Iterable[pd.DataFrame], column: str = "sentiment_score") -> pd.DataFrame:
+    """(date, value) frame of the per-day mean of column over a stream; memory grows with days, not rows."""
+    sums: Optional[pd.DataFrame] = None
+    for batch in batches:
+        # missing scores count as 0.0, like the store's series
+        g = batch[column].fillna(0.0).groupby(batch["date"].values).agg(["sum", "count"])
+        sums = g if sums is None else sums.add(g, fill_value=0)
+    if sums is None or sums.empty:
+        return pd.DataFrame(columns=["date", "value"])
+    sums = sums.sort_index()
+    return pd.DataFrame({"date": sums.index.values, "value": (sums["sum"] / sums["count"]).values})
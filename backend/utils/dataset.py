@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import os
+import re
+import glob
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .lazy import lazy_import
+from .columnar import COLUMNS, BATCH_ROWS, Predicate, scan, storage_path, reservoir_sample, daily_mean
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger("dataset")
+
+# CSVs up to this size are parsed once and kept in memory; larger exports (and any .parquet
+# sibling) are streamed per read with column projection and predicate pushdown
+RESIDENT_MAX_BYTES = int(os.getenv("DATASET_RESIDENT_MAX_BYTES", str(64 << 20)))
+# Headline scans for names that are not competitors are remembered per table, most recent first
+ADHOC_CACHE_SIZE = int(os.getenv("DATASET_ADHOC_CACHE_SIZE", "128"))
+
+
+class DomainTable:
+    """Parsed, typed contents of one domain CSV plus its lookup indexes."""
+
+    def __init__(self, domain: str, path: str, mtime: float, frame: pd.DataFrame, by_company: Dict[str, np.ndarray]):
+        self.domain = domain
+        self.path = path
+        self.mtime = mtime
+        self.frame = frame  # sorted by date ascending, RangeIndex
+        self.by_company = by_company  # lowercased competitor -> row positions (fixed at load)
+        self._adhoc: "OrderedDict[str, np.ndarray]" = OrderedDict()  # other names, LRU of ADHOC_CACHE_SIZE
+        self._adhoc_lock = threading.Lock()
+        self._dates = frame["date"].values
+
+    def __len__(self):
+        return len(self.frame)
+
+    def positions(self, company: str = "") -> np.ndarray:
+        """Row positions mentioning company (all rows when company is empty)."""
+        if not company:
+            return np.arange(len(self.frame))
+        key = company.lower()
+        pos = self.by_company.get(key)
+        if pos is not None:
+            return pos
+        with self._adhoc_lock:
+            pos = self._adhoc.get(key)
+            if pos is not None:
+                self._adhoc.move_to_end(key)
+                return pos
+        # Not a known competitor: scan, and keep the answer while the name stays recently used
+        mask = self.frame["headline"].str.contains(re.escape(company), case=False, na=False).values
+        pos = np.flatnonzero(mask)
+        with self._adhoc_lock:
+            self._adhoc[key] = pos
+            while len(self._adhoc) > ADHOC_CACHE_SIZE:
+                self._adhoc.popitem(last=False)
+        return pos
+
+    def date_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """[lo, hi) row positions with start <= date <= end (inclusive ISO dates)."""
+        lo = 0 if not start else int(np.searchsorted(self._dates, np.datetime64(start), side="left"))
+        hi = len(self._dates) if not end else int(np.searchsorted(self._dates, np.datetime64(end), side="right"))
+        return lo, hi
+
+
+def _read_domain_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={"headline": str, "link": str}, keep_default_na=False, na_values={"sentiment_score": [""]})
+    for col in COLUMNS:
+        if col not in df.columns:
+            df[col] = ""
+    df = df[COLUMNS]
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["sentiment_score"] = pd.to_numeric(df["sentiment_score"], errors="coerce").astype("float64")
+    df["source"] = df["source"].astype("category")
+    df["sentiment"] = df["sentiment"].astype("category")
+    df = df.dropna(subset=["date"]).sort_values("date", kind="mergesort").reset_index(drop=True)
+    return df
+
+
+def _company_index(frame: pd.DataFrame, companies: List[str]) -> Dict[str, np.ndarray]:
+    headlines = frame["headline"].str.lower()
+    return {c.lower(): np.flatnonzero(headlines.str.contains(c.lower(), regex=False).values) for c in companies}
+
+
+def to_records(frame: pd.DataFrame) -> List[dict]:
+    """Convert a typed slice (or a streamed batch) back into the standardized JSON-friendly record schema."""
+    if frame.empty:
+        return []
+    out = frame.copy()
+    if pd.api.types.is_datetime64_any_dtype(out["date"]):
+        out["date"] = out["date"].dt.strftime("%Y-%m-%d")
+    out["source"] = out["source"].astype(str)
+    out["sentiment"] = out["sentiment"].astype(str)
+    out["sentiment_score"] = out["sentiment_score"].astype(object).where(out["sentiment_score"].notna(), None)
+    return out.to_dict(orient="records")
+
+
+class DomainDataset:
+    """
+    Loads every backend/data/*.csv once and keeps it in memory as typed columns.
+    Tables are indexed by domain, company (competitor headline matches) and date;
+    a file is re-parsed only when its mtime changes. Exports above RESIDENT_MAX_BYTES, or
+    with a current .parquet sibling, are not held in memory: reads stream them instead.
+    """
+
+    def __init__(self, data_dir: str, competitors: Dict[str, List[str]]):
+        self.data_dir = data_dir
+        self.competitors = competitors
+        self._tables: Dict[str, DomainTable] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, domain: str) -> str:
+        return os.path.join(self.data_dir, f"{domain}.csv")
+
+    def storage_for(self, domain: str) -> Optional[str]:
+        """The file reads use for domain: the CSV, or its .parquet sibling (see columnar.storage_path)."""
+        return storage_path(self.path_for(domain))
+
+    def version(self, domain: str) -> Optional[float]:
+        """mtime of the domain's storage file; None when there is none."""
+        path = self.storage_for(domain)
+        try:
+            return os.stat(path).st_mtime if path else None
+        except OSError:
+            return None
+
+    def _resident(self, path: Optional[str]) -> bool:
+        if not path or path.endswith(".parquet"):
+            return False
+        try:
+            return os.stat(path).st_size <= RESIDENT_MAX_BYTES
+        except OSError:
+            return False
+
+    def load_all(self) -> int:
+        """Parse every CSV under data_dir that is kept in memory. Returns the number of tables loaded."""
+        for path in sorted(glob.glob(os.path.join(self.data_dir, "*.csv"))):
+            self.table(os.path.splitext(os.path.basename(path))[0])
+        return len(self._tables)
+
+    def table(self, domain: str) -> Optional[DomainTable]:
+        """The in-memory table for domain; None when it has no CSV or is read by streaming."""
+        path = self.path_for(domain)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            self._tables.pop(domain, None)
+            return None
+        if not self._resident(self.storage_for(domain)):
+            self._tables.pop(domain, None)
+            return None
+        t = self._tables.get(domain)
+        if t is not None and t.mtime == mtime:
+            return t
+        with self._lock:
+            t = self._tables.get(domain)
+            if t is not None and t.mtime == mtime:
+                return t
+            try:
+                frame = _read_domain_csv(path)
+            except Exception as e:
+                logger.exception("Failed to load %s: %s", path, e)
+                return t
+            t = DomainTable(domain, path, mtime, frame, _company_index(frame, self.competitors.get(domain, [])))
+            self._tables[domain] = t
+            logger.info("Loaded %s (%d rows)", path, len(frame))
+            return t
+
+    def first_available(self, domains: List[str]) -> Optional[str]:
+        for d in domains:
+            if self.version(d) is not None:
+                return d
+        return None
+
+    def scan(self, domain: str, columns: Optional[Sequence[str]] = None, predicate: Optional[Predicate] = None,
+             batch_rows: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        """Stream the matching rows of domain's storage file in batches (see columnar.scan)."""
+        path = self.storage_for(domain)
+        if path is None:
+            return iter(())
+        return scan(path, columns, predicate, batch_rows)
+
+    def records(self, domain: str, batch_rows: int = BATCH_ROWS) -> Iterator[List[dict]]:
+        """Every row of domain as record dicts, batch_rows at a time, from memory or streamed."""
+        t = self.table(domain)
+        if t is not None:
+            for lo in range(0, len(t.frame), batch_rows):
+                yield to_records(t.frame.iloc[lo:lo + batch_rows])
+            return
+        for batch in self.scan(domain, batch_rows=batch_rows):
+            yield to_records(batch)
+
+    def _predicate(self, company: str, start: Optional[str], end: Optional[str],
+                   sentiments: Optional[Sequence[str]]) -> Predicate:
+        return Predicate(start=start, end=end, sentiments=sentiments,
+                         contains="" if company == "aggregate" else company)
+
+    def sample(self, domain: str, limit: int = 20, company: str = "", start: Optional[str] = None,
+               end: Optional[str] = None, sentiments: Optional[Sequence[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Up to `limit` random records for domain, newest first, optionally only those mentioning
+        company, dated start..end (inclusive) or labelled with one of sentiments.
+        """
+        t = self.table(domain)
+        if t is None:
+            # streamed: one pass, a reservoir of `limit` rows
+            path = self.storage_for(domain)
+            sub = reservoir_sample(self.scan(domain, predicate=self._predicate(company, start, end, sentiments)), limit)
+            if not len(sub):
+                return [], path
+            return to_records(sub.sort_values("date", kind="mergesort").iloc[::-1]), path
+        pos = t.positions(company)
+        if start or end:
+            lo, hi = t.date_range(start, end)
+            pos = pos[(pos >= lo) & (pos < hi)]
+        if sentiments:
+            pos = pos[t.frame["sentiment"].isin(sentiments).values[pos]]
+        if len(pos) > limit:
+            pos = np.sort(np.random.default_rng().choice(pos, size=max(limit, 0), replace=False))
+        return to_records(t.frame.iloc[pos[::-1]]), t.path
+
+    def series(self, domain: str, company: str = "", start: Optional[str] = None,
+               end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Date-ordered (date, value) sentiment series for domain/company. Streamed exports come back
+        as one averaged value per day, which is what the forecasters fit on.
+        """
+        t = self.table(domain)
+        if t is None:
+            pred = self._predicate(company, start, end, None)
+            return daily_mean(self.scan(domain, columns=["date", "sentiment_score"], predicate=pred))
+        pos = t.positions(company) if company and company != "aggregate" else np.arange(len(t.frame))
+        if start or end:
+            lo, hi = t.date_range(start, end)
+            pos = pos[(pos >= lo) & (pos < hi)]
+        sub = t.frame.iloc[pos]
+        return pd.DataFrame({"date": sub["date"].values, "value": sub["sentiment_score"].fillna(0.0).values})
@@ -0,0 +1,105 @@
+import os
+import hashlib
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+
+from .text import normalize_words
+
+# Near-duplicate headlines: the same story syndicated across providers with small title edits
+# ("Acme raises $2B - Reuters" vs "Acme Raises $2B in new round | CNBC"). Headlines are reduced
+# to word sets; a MinHash signature split into LSH bands finds candidate pairs in O(1) per record,
+# and a candidate counts as a duplicate when the exact Jaccard similarity reaches the threshold.
+
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4  # candidates from roughly (1/BANDS)^(1/ROWS) = 0.5 similarity upwards
+
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, 1 << 61, MINHASH_BANDS * MINHASH_ROWS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 61, MINHASH_BANDS * MINHASH_ROWS, dtype=np.uint64)
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    """Normalized word set of a headline: no publisher suffix, stop words or plural 's'."""
+    return frozenset(normalize_words(text))
+
+
+def minhash(words: FrozenSet[str]) -> np.ndarray:
+    """MinHash signature (BANDS * ROWS uint64 values) of a word set."""
+    x = np.array([int.from_bytes(hashlib.blake2b(w.encode("utf-8"), digest_size=8).digest(), "little") >> 3
+                  for w in words], dtype=np.uint64)
+    # (a * x + b) mod p, per permutation; uint64 wraparound keeps it a cheap universal hash
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate detector. add() each record as it arrives: the first record of a
+    story becomes its representative, later copies only bump the representative's
+    "cluster_size". With capacity set, only the most recent representatives are kept.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, capacity: Optional[int] = None):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._reps: "OrderedDict[int, dict]" = OrderedDict()  # id -> {"words", "bands", "record"}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(MINHASH_BANDS)]
+        self._next_id = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def _bands(words: FrozenSet[str]) -> List[bytes]:
+        sig = minhash(words)
+        return [sig[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS].tobytes() for i in range(MINHASH_BANDS)]
+
+    def add(self, record: dict) -> Optional[dict]:
+        """Register record; returns the representative it duplicates, or None if it is new."""
+        record.setdefault("cluster_size", 1)
+        words = shingles(record.get("headline") or "")
+        if not words:
+            return None
+        keys = self._bands(words)
+        seen = set()
+        for band, key in enumerate(keys):
+            for rid in self._buckets[band].get(key, ()):
+                if rid in seen:
+                    continue
+                seen.add(rid)
+                rep = self._reps[rid]
+                if jaccard(words, rep["words"]) >= self.threshold:
+                    rep["record"]["cluster_size"] = rep["record"].get("cluster_size", 1) + record["cluster_size"]
+                    self._reps.move_to_end(rid)
+                    self.duplicates += 1
+                    return rep["record"]
+        rid = self._next_id
+        self._next_id += 1
+        self._reps[rid] = {"words": words, "bands": keys, "record": record}
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(rid)
+        if self.capacity and len(self._reps) > self.capacity:
+            self._evict(*self._reps.popitem(last=False))
+        return None
+
+    def _evict(self, rid: int, rep: dict) -> None:
+        for band, key in enumerate(rep["bands"]):
+            ids = self._buckets[band].get(key)
+            if ids is not None:
+                ids.remove(rid)
+                if not ids:
+                    del self._buckets[band][key]
+
+    def __len__(self) -> int:
+        return len(self._reps)
+
+
+def collapse(records: Iterable[dict], threshold: float = NEAR_DUP_THRESHOLD) -> List[dict]:
+    """One representative per near-duplicate cluster, in first-seen order, each with cluster_size."""
+    index = NearDuplicateIndex(threshold)
+    return [r for r in records if index.add(r) is None]
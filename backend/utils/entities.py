@@ -0,0 +1,156 @@
+import os
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("entities")
+
+# Extra surface forms per competitor: short names, former names and stock tickers.
+# All-caps aliases (tickers) only match case-sensitively, so "NET" does not fire on "net income".
+# More can be supplied as {"Company": ["alias", ...]} JSON via ENTITY_ALIASES_PATH.
+DEFAULT_ALIASES: Dict[str, List[str]] = {
+    "OpenAI": ["ChatGPT"],
+    "DeepMind": ["Google DeepMind"],
+    "Hugging Face": ["HuggingFace"],
+    "AWS": ["Amazon Web Services", "AMZN"],
+    "Microsoft Azure": ["Azure", "MSFT"],
+    "Google Cloud": ["GCP"],
+    "Salesforce": ["CRM"],
+    "Oracle": ["ORCL"],
+    "Palo Alto Networks": ["PANW"],
+    "CrowdStrike": ["CRWD"],
+    "Fortinet": ["FTNT"],
+    "Cloudflare": ["NET"],
+    "Check Point": ["Check Point Software", "CHKP"],
+    "Coinbase": ["COIN"],
+    "Polygon Labs": ["Polygon"],
+    "Meta (Reality Labs)": ["Meta", "Reality Labs", "Oculus"],
+    "HTC Vive": ["Vive"],
+    "ABB Robotics": ["ABB"],
+    "iRobot": ["IRBT"],
+    "UiPath": ["PATH"],
+    "Intel": ["INTC"],
+    "AMD": ["Advanced Micro Devices"],
+    "NVIDIA": ["NVDA"],
+    "TSMC": ["Taiwan Semiconductor", "TSM"],
+    "Qualcomm": ["QCOM"],
+    "IBM Quantum": ["IBM"],
+    "Rigetti": ["Rigetti Computing", "RGTI"],
+    "IonQ": ["IONQ"],
+    "D-Wave Systems": ["D-Wave", "QBTS"],
+    "Xanadu": ["Xanadu Quantum"],
+    "Apple": ["AAPL"],
+    "Samsung Electronics": ["Samsung"],
+    "Sony": ["SONY"],
+    "LG Electronics": ["LG"],
+    "Xiaomi": [],
+    "Tesla Energy": ["Powerwall", "Megapack"],
+    "Enphase Energy": ["Enphase", "ENPH"],
+    "Siemens Energy": [],
+    "Ørsted": ["Orsted"],
+    "First Solar": ["FSLR"],
+}
+
+
+def load_aliases(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """DEFAULT_ALIASES merged with the JSON file at path (or ENTITY_ALIASES_PATH)."""
+    aliases = {k: list(v) for k, v in DEFAULT_ALIASES.items()}
+    path = path or os.getenv("ENTITY_ALIASES_PATH", "")
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                for company, extra in json.load(f).items():
+                    aliases.setdefault(company, []).extend(extra)
+        except Exception as e:
+            logger.warning("Could not load aliases from %s: %s", path, e)
+    return aliases
+
+
+class EntityMatcher:
+    """
+    Aho-Corasick automaton over the lowercased surface forms of every company.
+    find() scans a text once, whatever the number of companies, and only accepts
+    matches on word boundaries. All-caps aliases must also match case exactly.
+    """
+
+    def __init__(self, surface_forms: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        self._canonical: Dict[str, str] = {}
+        for company, forms in surface_forms.items():
+            self._canonical[company.lower()] = company
+            self._add(company.strip().lower(), company, None)
+            for form in forms:
+                form = form.strip()
+                if form and form.lower() != company.lower():
+                    self._add(form.lower(), company, form if form.isupper() else None)
+        self._build()
+
+    @classmethod
+    def from_domains(cls, domains: Dict[str, dict], aliases: Optional[Dict[str, List[str]]] = None) -> "EntityMatcher":
+        aliases = load_aliases() if aliases is None else aliases
+        forms = {}
+        for meta in domains.values():
+            for company in meta["competitors"]:
+                forms[company] = aliases.get(company, [])
+        return cls(forms)
+
+    def _add(self, pattern: str, company: str, exact: Optional[str]) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((company, len(pattern), exact))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def canonical(self, company: str) -> Optional[str]:
+        """The known company name for `company` (case-insensitive), or None."""
+        return self._canonical.get((company or "").strip().lower())
+
+    def find(self, text: str) -> List[str]:
+        """Companies mentioned in text, in order of first mention."""
+        text = text or ""
+        t = text.lower()
+        same_len = len(t) == len(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Dict[str, None] = {}
+        node = 0
+        n = len(t)
+        for i, ch in enumerate(t):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for company, length, exact in out[node]:
+                start = i - length + 1
+                if start > 0 and t[start - 1].isalnum() or i + 1 < n and t[i + 1].isalnum():
+                    continue
+                if exact is not None and not (same_len and text[start:i + 1] == exact):
+                    continue
+                found[company] = None
+        return list(found)
+
+    def tag(self, records: Iterable[dict]) -> List[dict]:
+        """Set record["companies"] from each record's headline."""
+        records = list(records)
+        for r in records:
+            r["companies"] = self.find(r.get("headline") or "")
+        return records
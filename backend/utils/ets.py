@@ -0,0 +1,65 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Pure-NumPy exponential smoothing: additive damped-trend ETS(A,Ad,N), fitted for many
+# series at once. Each series picks its own (alpha, beta, phi) from a small grid by
+# in-sample one-step SSE; prediction intervals use the analytic ETS variance.
+
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+BETA_RATIOS = np.array([0.0, 0.1, 0.3])  # beta = alpha * ratio keeps beta <= alpha
+PHIS = np.array([0.8, 0.9, 0.98, 1.0])
+
+
+def _grid() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    a, r, p = np.meshgrid(ALPHAS, BETA_RATIOS, PHIS, indexing="ij")
+    a, r, p = a.ravel(), r.ravel(), p.ravel()
+    return a, a * r, p
+
+
+def fit_predict(Y: np.ndarray, horizon: int, z: float = 1.96) -> Dict[str, np.ndarray]:
+    """
+    Y: (n_series, T) float array on a regular time axis, no NaNs.
+    Returns dict with yhat, lower, upper of shape (n_series, horizon) and the chosen
+    alpha, beta, phi, sigma per series.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    n, T = Y.shape
+    alpha, beta, phi = _grid()
+    g = alpha.size
+
+    level = np.repeat(Y[:, :1], g, axis=1)  # (n, g)
+    trend = np.repeat((Y[:, 1:2] - Y[:, :1]) if T > 1 else np.zeros((n, 1)), g, axis=1)
+    sse = np.zeros((n, g))
+    for t in range(1, T):
+        damped = phi * trend
+        err = Y[:, t:t + 1] - (level + damped)
+        sse += err * err
+        level = level + damped + alpha * err
+        trend = damped + beta * err
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(n)
+    a, b, p = alpha[best], beta[best], phi[best]
+    l_T, b_T = level[rows, best], trend[rows, best]
+    sigma2 = sse[rows, best] / max(T - 1, 1)
+
+    h = np.arange(1, horizon + 1)
+    # phi_h = phi + phi^2 + ... + phi^h, per series
+    phi_pow = p[:, None] ** h[None, :]
+    phi_h = np.cumsum(phi_pow, axis=1)
+    yhat = l_T[:, None] + phi_h * b_T[:, None]
+
+    # Var(h) = sigma^2 * (1 + sum_{j=1}^{h-1} (alpha + beta * phi_j)^2)
+    c2 = (a[:, None] + b[:, None] * phi_h) ** 2
+    var = sigma2[:, None] * (1.0 + np.concatenate([np.zeros((n, 1)), np.cumsum(c2[:, :-1], axis=1)], axis=1))
+    half = z * np.sqrt(var)
+    return {
+        "yhat": yhat,
+        "lower": yhat - half,
+        "upper": yhat + half,
+        "alpha": a,
+        "beta": b,
+        "phi": p,
+        "sigma": np.sqrt(sigma2),
+    }
@@ -2,49 +2,132 @@ import os
 import time
 import random
 import logging
-from typing import List, Dict, Tuple
+import threading
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Tuple, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
-# Environment loader
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+from .settings import SETTINGS
+from .resilience import ProviderUnavailable, RetryLater, get_breaker, get_limiter
+from .metrics import PROVIDER_CALLS, PROVIDER_LATENCY
+from .tracing import span
 
 logger = logging.getLogger("fetchers")
 
 DEFAULT_HEADERS = {"User-Agent": "InSightIQ/1.0"}
 
-# Simple retry with exponential backoff
-def _request_with_retries(method: str, url: str, *, params=None, headers=None, json=None, max_retries: int = 3, base_delay: float = 0.5):
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+# Backoff after a retryable failure when the provider sends no Retry-After
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "60"))
+
+# Keep-alive connection pools, one Session per provider
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(provider: str) -> requests.Session:
+    """Pooled session for provider; pool size from {PROVIDER}_POOL_SIZE or HTTP_POOL_SIZE."""
+    sess = _sessions.get(provider)
+    if sess is not None:
+        return sess
+    with _sessions_lock:
+        sess = _sessions.get(provider)
+        if sess is None:
+            size = int(os.getenv(f"{provider.upper()}_POOL_SIZE", HTTP_POOL_SIZE))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            sess = requests.Session()
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _sessions[provider] = sess
+    return sess
+
+
+def _base_url(provider: str, default: str) -> str:
+    """Provider origin; {PROVIDER}_BASE_URL points it elsewhere (a proxy, or the bench stubs)."""
+    return (SETTINGS.get(f"{provider.upper()}_BASE_URL") or default).rstrip("/")
+
+
+def _retry_after(resp) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP-date)."""
+    value = (resp.headers or {}).get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _backoff(failures: int) -> float:
+    return min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** max(failures - 1, 0))) + random.random() * 0.2
+
+
+def _retryable(status: Optional[int]) -> bool:
+    # no response at all (timeout, connection error), throttling, or a server-side failure
+    return status is None or status in (408, 429) or status >= 500
+
+
+# One attempt per call, gated by the provider's token bucket and circuit breaker (ProviderUnavailable
+# when either says no). A retryable failure is not waited out on this thread: the limiter is paused
+# for the backoff (Retry-After when given, else exponential in the breaker's consecutive failures)
+# and RetryLater tells the caller when to repeat the call. The ingest scheduler re-queues the target
+# for then; the alert dispatcher retries the batch on its next flush.
+def _provider_request(method: str, url: str, *, params=None, headers=None, json=None, provider: str = "default"):
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        PROVIDER_CALLS.inc(provider=provider, outcome="circuit_open")
+        raise ProviderUnavailable(provider, "circuit_open")
+    limiter = get_limiter(provider)
+    if not limiter.try_acquire():
+        # Nothing was sent, so this says nothing about the provider's health
+        breaker.release()
+        PROVIDER_CALLS.inc(provider=provider, outcome="rate_limited")
+        raise ProviderUnavailable(provider, "rate_limited")
     headers = {**DEFAULT_HEADERS, **(headers or {})}
-    last_exc = None
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = requests.request(method, url, params=params, headers=headers, json=json, timeout=30)
-            if resp.status_code == 429:
-                delay = base_delay * (2 ** (attempt - 1)) + random.random() * 0.2
-                logger.warning(f"Rate limited on {url} (429). Backing off {delay:.2f}s (attempt {attempt}/{max_retries})")
-                time.sleep(delay)
-                continue
-            resp.raise_for_status()
-            return resp
-        except Exception as e:
-            last_exc = e
-            delay = base_delay * (2 ** (attempt - 1)) + random.random() * 0.2
-            logger.warning(f"Request error {e} on {url}. Retrying in {delay:.2f}s (attempt {attempt}/{max_retries})")
-            time.sleep(delay)
-    raise last_exc
+    resp = None
+    t0 = time.perf_counter()
+    try:
+        with span("provider.request", provider=provider) as s:
+            resp = get_session(provider).request(method, url, params=params, headers=headers, json=json, timeout=HTTP_TIMEOUT)
+            s["status"] = resp.status_code
+        PROVIDER_LATENCY.observe(time.perf_counter() - t0, provider=provider)
+        resp.raise_for_status()
+    except Exception as e:
+        if resp is None:
+            PROVIDER_LATENCY.observe(time.perf_counter() - t0, provider=provider)
+        status = resp.status_code if resp is not None else None
+        PROVIDER_CALLS.inc(provider=provider, outcome="http_429" if status == 429 else "http_error" if resp is not None else "error")
+        breaker.record_failure()
+        if not _retryable(status):
+            raise
+        delay = _retry_after(resp)
+        if delay is None:
+            delay = _backoff(breaker.failures)
+        limiter.pause(delay)
+        logger.warning(f"Request error {e} on {url}. Provider paused, retry in {delay:.2f}s")
+        raise RetryLater(provider, delay) from e
+    breaker.record_success()
+    PROVIDER_CALLS.inc(provider=provider, outcome="ok")
+    return resp
 
 # Each fetcher returns standardized records: [{date, headline, source, sentiment, sentiment_score, link}]
 
 def fetch_gnews(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
-    api_key = os.getenv("GNEWS_API_KEY", "")
+    api_key = SETTINGS.get("GNEWS_API_KEY")
     if not api_key:
         return [], 'api:gnews_missing_key'
     try:
-        url = "https://gnews.io/api/v4/search"
+        url = _base_url("gnews", "https://gnews.io") + "/api/v4/search"
         params = {"q": query, "lang": "en", "token": api_key, "max": min(limit, 100)}
-        resp = _request_with_retries("GET", url, params=params)
+        resp = _provider_request("GET", url, params=params, provider="gnews")
         data = resp.json()
         out = []
         for a in data.get("articles", []):
@@ -57,18 +140,23 @@ def fetch_gnews(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
                 "link": a.get("url") or ""
             })
         return out, 'api:gnews'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("GNews skipped: %s", e.reason)
+        return [], 'api:gnews_' + e.reason
     except Exception as e:
         logger.exception("GNews fetch failed: %s", e)
         return [], 'api:gnews_error'
 
 def fetch_serp_news(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
-    api_key = os.getenv("SERPAPI_KEY", "")
+    api_key = SETTINGS.get("SERPAPI_KEY")
     if not api_key:
         return [], 'api:serp_missing_key'
     try:
-        url = "https://serpapi.com/search.json"
+        url = _base_url("serpapi", "https://serpapi.com") + "/search.json"
         params = {"engine": "google", "q": query, "tbm": "nws", "api_key": api_key}
-        resp = _request_with_retries("GET", url, params=params)
+        resp = _provider_request("GET", url, params=params, provider="serpapi")
         items = resp.json().get("news_results", [])
         out = []
         for it in items[:limit]:
@@ -81,6 +169,11 @@ def fetch_serp_news(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
                 "link": it.get("link") or ""
             })
         return out, 'api:serp'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("SerpAPI skipped: %s", e.reason)
+        return [], 'api:serp_' + e.reason
     except Exception as e:
         logger.exception("SerpAPI fetch failed: %s", e)
         return [], 'api:serp_error'
@@ -88,18 +181,18 @@ def fetch_serp_news(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
 # Placeholders for social/finance APIs (implementations can be expanded)
 
 def fetch_twitter_recent(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
-    token = os.getenv("TWITTER_BEARER_TOKEN", "")
+    token = SETTINGS.get("TWITTER_BEARER_TOKEN")
     if not token:
         return [], 'api:twitter_missing_key'
     try:
-        url = "https://api.twitter.com/2/tweets/search/recent"
+        url = _base_url("twitter", "https://api.twitter.com") + "/2/tweets/search/recent"
         params = {
             "query": query,
             "tweet.fields": "created_at,public_metrics,lang",
             "max_results": min(limit, 100)
         }
         headers = {"Authorization": f"Bearer {token}"}
-        resp = _request_with_retries("GET", url, params=params, headers=headers)
+        resp = _provider_request("GET", url, params=params, headers=headers, provider="twitter")
         out = []
         for t in resp.json().get("data", [])[:limit]:
             out.append({
@@ -111,6 +204,11 @@ def fetch_twitter_recent(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
                 "link": f"https://twitter.com/i/web/status/{t.get('id')}"
             })
         return out, 'api:twitter'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("Twitter skipped: %s", e.reason)
+        return [], 'api:twitter_' + e.reason
     except Exception as e:
         logger.exception("Twitter fetch failed: %s", e)
         return [], 'api:twitter_error'
@@ -118,10 +216,10 @@ def fetch_twitter_recent(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
 def fetch_reddit_search(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
     # To avoid PRAW dependency in this minimal wrapper, use Reddit JSON search (limited)
     try:
-        url = "https://www.reddit.com/search.json"
+        url = _base_url("reddit", "https://www.reddit.com") + "/search.json"
         params = {"q": query, "limit": min(limit, 50), "sort": "new"}
         headers = {"User-Agent": "InSightIQ/1.0"}
-        resp = _request_with_retries("GET", url, params=params, headers=headers)
+        resp = _provider_request("GET", url, params=params, headers=headers, provider="reddit")
         out = []
         for c in resp.json().get("data", {}).get("children", [])[:limit]:
             d = c.get("data", {})
@@ -134,6 +232,11 @@ def fetch_reddit_search(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
                 "link": f"https://www.reddit.com{d.get('permalink','')}"
             })
         return out, 'api:reddit_public'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("Reddit skipped: %s", e.reason)
+        return [], 'api:reddit_' + e.reason
     except Exception as e:
         logger.exception("Reddit fetch failed: %s", e)
         return [], 'api:reddit_error'
@@ -141,7 +244,7 @@ def fetch_reddit_search(query: str, limit: int = 20) -> Tuple[List[Dict], str]:
 # Financial APIs (Finnhub, AlphaVantage) minimal stubs
 
 def fetch_finnhub_news(symbol: str, limit: int = 20) -> Tuple[List[Dict], str]:
-    key = os.getenv("FINNHUB_KEY", "")
+    key = SETTINGS.get("FINNHUB_KEY")
     if not key:
         return [], 'api:finnhub_missing_key'
     try:
@@ -151,7 +254,7 @@ def fetch_finnhub_news(symbol: str, limit: int = 20) -> Tuple[List[Dict], str]:
         to_d = date.today()
         from_d = to_d - timedelta(days=7)
         params = {"symbol": symbol, "from": str(from_d), "to": str(to_d), "token": key}
-        resp = _request_with_retries("GET", url, params=params)
+        resp = _provider_request("GET", url, params=params, provider="finnhub")
         out = []
         for a in resp.json()[:limit]:
             out.append({
@@ -163,18 +266,23 @@ def fetch_finnhub_news(symbol: str, limit: int = 20) -> Tuple[List[Dict], str]:
                 "link": a.get("url") or ""
             })
         return out, 'api:finnhub'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("Finnhub skipped: %s", e.reason)
+        return [], 'api:finnhub_' + e.reason
     except Exception as e:
         logger.exception("Finnhub fetch failed: %s", e)
         return [], 'api:finnhub_error'
 
 def fetch_alphavantage_news(symbol: str, limit: int = 20) -> Tuple[List[Dict], str]:
-    key = os.getenv("ALPHAVANTAGE_KEY", "")
+    key = SETTINGS.get("ALPHAVANTAGE_KEY")
     if not key:
         return [], 'api:alphavantage_missing_key'
     try:
         url = "https://www.alphavantage.co/query"
         params = {"function": "NEWS_SENTIMENT", "tickers": symbol, "apikey": key}
-        resp = _request_with_retries("GET", url, params=params)
+        resp = _provider_request("GET", url, params=params, provider="alphavantage")
         out = []
         for it in resp.json().get("feed", [])[:limit]:
             out.append({
@@ -186,6 +294,11 @@ def fetch_alphavantage_news(symbol: str, limit: int = 20) -> Tuple[List[Dict], s
                 "link": it.get("url") or ""
             })
         return out, 'api:alphavantage'
+    except RetryLater:
+        raise
+    except ProviderUnavailable as e:
+        logger.info("AlphaVantage skipped: %s", e.reason)
+        return [], 'api:alphavantage_' + e.reason
     except Exception as e:
         logger.exception("AlphaVantage fetch failed: %s", e)
         return [], 'api:alphavantage_error'
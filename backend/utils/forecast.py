@@ -1,96 +1,342 @@
+from __future__ import annotations
+
 import os
+import hashlib
+import importlib.util
 import logging
-from typing import Tuple
-import pandas as pd
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from datetime import datetime
 
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+from .settings import SETTINGS
+from .lazy import lazy_import
+from .metrics import STAGE_LATENCY
+from .tracing import span, propagate
+from .ets import fit_predict as _ets_fit_predict
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger("forecast")
 
-# Prophet wrapper
-try:
-    from prophet import Prophet  # type: ignore
-    _has_prophet = True
-except Exception:
+# Prophet wrapper: presence is checked without importing it; the import (seconds) happens on first fit
+_has_prophet = any(importlib.util.find_spec(m) is not None for m in ("prophet", "fbprophet"))
+_Prophet = None
+_prophet_lock = threading.Lock()
+
+
+def _prophet_class():
+    global _Prophet, _has_prophet
+    with _prophet_lock:
+        if _Prophet is None and _has_prophet:
+            try:
+                from prophet import Prophet  # type: ignore
+            except Exception:
+                try:
+                    from fbprophet import Prophet  # type: ignore
+                except Exception as e:
+                    logger.warning("Prophet is installed but failed to import: %s", e)
+                    _has_prophet = False
+                    return None
+            _Prophet = Prophet
+    return _Prophet
+
+# prophet | ets | naive; ETS replaces the flat line when Prophet is not installed
+FORECAST_ENGINE = SETTINGS.get("FORECAST_ENGINE", "prophet" if _has_prophet else "ets").lower()
+
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+# Fitted Prophet models keyed by (series_key, content hash), LRU-bounded
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "64"))
+_FIT_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("FORECAST_FIT_WORKERS", "2")), thread_name_prefix="prophet-fit")
+
+
+class _FittedModel:
+    """A fitted Prophet model plus its predictions per horizon."""
+
+    def __init__(self, model):
+        self.model = model
+        self._forecasts: Dict[int, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def forecast(self, days: int) -> pd.DataFrame:
+        with self._lock:
+            fdf = self._forecasts.get(days)
+            if fdf is None:
+                future = self.model.make_future_dataframe(periods=days)
+                fdf = self.model.predict(future)[FORECAST_COLUMNS].tail(days).reset_index(drop=True)
+                self._forecasts[days] = fdf
+            return fdf
+
+
+_models: "OrderedDict[Tuple[str, str], _FittedModel]" = OrderedDict()
+_last_good: Dict[str, Tuple[str, str]] = {}  # series_key -> key of its newest fitted model
+_pending: Dict[Tuple[str, str], Future] = {}  # fits in progress, background or inline
+_models_lock = threading.Lock()
+
+
+def _content_hash(df: pd.DataFrame) -> str:
+    h = pd.util.hash_pandas_object(df[["date", "value"]].astype({"date": str}), index=False)
+    return hashlib.sha1(h.values.tobytes()).hexdigest()
+
+
+def _fit(key: Tuple[str, str], df: pd.DataFrame) -> _FittedModel:
+    m = _prophet_class()()
+    with span("forecast.fit", engine="prophet", rows=len(df)):
+        m.fit(df.rename(columns={"date": "ds", "value": "y"}))
+    fitted = _FittedModel(m)
+    with _models_lock:
+        _models[key] = fitted
+        _models.move_to_end(key)
+        _last_good[key[0]] = key
+        while len(_models) > FORECAST_CACHE_SIZE:
+            old, _ = _models.popitem(last=False)
+            if _last_good.get(old[0]) == old:
+                del _last_good[old[0]]
+        _pending.pop(key, None)
+    return fitted
+
+
+def _fit_in_background(key: Tuple[str, str], df: pd.DataFrame) -> None:
+    def run():
+        try:
+            return _fit(key, df)
+        except Exception as e:
+            logger.exception("Background Prophet fit failed for %s: %s", key[0], e)
+            with _models_lock:
+                _pending.pop(key, None)
+            return None
+    with _models_lock:
+        if key in _pending or key in _models:
+            return
+        _pending[key] = _FIT_POOL.submit(run)
+
+
+def _fit_once(key: Tuple[str, str], df: pd.DataFrame) -> _FittedModel:
+    """Inline fit, single-flight per key: concurrent callers wait for the fit already running."""
+    with _models_lock:
+        fitted = _models.get(key)
+        if fitted is not None:
+            return fitted
+        fut = _pending.get(key)
+        owner = fut is None
+        if owner:
+            fut = _pending[key] = Future()
+    if not owner:
+        # a failed background fit resolves to None; fit here instead
+        return fut.result() or _fit(key, df)
     try:
-        from fbprophet import Prophet  # type: ignore
-        _has_prophet = True
-    except Exception:
-        _has_prophet = False
+        fitted = _fit(key, df)
+    except BaseException as e:
+        with _models_lock:
+            _pending.pop(key, None)
+        fut.set_exception(e)
+        raise
+    fut.set_result(fitted)
+    return fitted
+
+
+def _naive_forecast(df: pd.DataFrame, days: int) -> pd.DataFrame:
+    # Simple projection: last value flatline with slight noise band
+    out = df.copy()
+    out = out.rename(columns={"date": "ds", "value": "y"})
+    out["ds"] = pd.to_datetime(out["ds"])  # ensure datetime
+    last = float(out["y"].iloc[-1]) if not out.empty else 0.0
+    future_dates = pd.date_range(out["ds"].max(), periods=days+1, inclusive="right")
+    fdf = pd.DataFrame({"ds": future_dates})
+    fdf["yhat"] = last
+    fdf["yhat_lower"] = last * 0.98
+    fdf["yhat_upper"] = last * 1.02
+    return fdf[FORECAST_COLUMNS]
+
+
+def _daily_matrix(series: Dict[str, pd.DataFrame]) -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """
+    Align (date, value) frames on one daily axis: values are averaged per day, gaps are
+    carried forward and each series is back-filled before its first observation.
+    """
+    daily = {}
+    for name, df in series.items():
+        if df is None or df.empty:
+            continue
+        s = pd.Series(pd.to_numeric(df["value"], errors="coerce").values, index=pd.to_datetime(df["date"]))
+        daily[name] = s.groupby(level=0).mean()
+    if not daily:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+    frame = pd.DataFrame(daily)
+    frame = frame.reindex(pd.date_range(frame.index.min(), frame.index.max(), freq="D"))
+    frame = frame.ffill().bfill().fillna(0.0)
+    return frame.index, list(frame.columns), frame.to_numpy(dtype=float).T
+
+
+def forecast_batch(series: Dict[str, pd.DataFrame], days: int = 30) -> Dict[str, pd.DataFrame]:
+    """
+    Forecast many (date, value) series in one vectorized ETS pass.
+    Returns {name: forecast_df}; names with no data map to an empty frame.
+    """
+    with span("forecast", engine="ets_batch", series=len(series)), STAGE_LATENCY.time(stage="forecast", engine="ets_batch"):
+        return _ets_batch(series, days)
+
+
+def _ets_batch(series: Dict[str, pd.DataFrame], days: int) -> Dict[str, pd.DataFrame]:
+    out = {name: pd.DataFrame(columns=FORECAST_COLUMNS) for name in series}
+    dates, names, Y = _daily_matrix(series)
+    if not names:
+        return out
+    res = _ets_fit_predict(Y, days)
+    future = pd.date_range(dates[-1], periods=days + 1, inclusive="right")
+    for i, name in enumerate(names):
+        out[name] = pd.DataFrame({"ds": future, "yhat": res["yhat"][i], "yhat_lower": res["lower"][i], "yhat_upper": res["upper"][i]})
+    return out
 
 
-def forecast_timeseries(df: pd.DataFrame, days: int = 30) -> Tuple[pd.DataFrame, bool]:
+def _prophet_forecast(df: pd.DataFrame, days: int, series_key: Optional[str], background: bool) -> pd.DataFrame:
+    key = (series_key or "", _content_hash(df))
+    with _models_lock:
+        fitted = _models.get(key)
+        if fitted is not None:
+            _models.move_to_end(key)
+        previous = _models.get(_last_good.get(key[0])) if series_key else None
+    if fitted is None and previous is not None and background:
+        _fit_in_background(key, df)
+        fitted = previous
+    if fitted is None:
+        fitted = _fit_once(key, df)
+    return fitted.forecast(days)
+
+
+def forecast_timeseries(df: pd.DataFrame, days: int = 30, series_key: Optional[str] = None, background: bool = True, engine: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
     """
     Takes a DataFrame with columns: date (YYYY-MM-DD) and value
-    Returns (forecast_df, used_prophet)
+    Returns (forecast_df, engine) where engine is "prophet", "ets" or "naive".
+
+    engine defaults to FORECAST_ENGINE. Fitted Prophet models are cached by (series_key,
+    content hash of df). When the data behind a known series_key changes, the previous
+    model's forecast is returned immediately and the refit runs in the background (unless
+    background=False). Only a series never seen before is fitted inline, once per key
+    however many requests arrive for it at the same time.
     """
+    t0 = time.perf_counter()
+    with span("forecast") as s:
+        out, used = _forecast_timeseries(df, days, series_key, background, engine)
+        s["engine"] = used
+    STAGE_LATENCY.observe(time.perf_counter() - t0, stage="forecast", engine=used)
+    return out, used
+
+
+def _forecast_timeseries(df: pd.DataFrame, days: int, series_key: Optional[str], background: bool, engine: Optional[str]) -> Tuple[pd.DataFrame, str]:
     if df is None or df.empty:
-        return pd.DataFrame(columns=["ds", "yhat", "yhat_lower", "yhat_upper"]), False
+        return pd.DataFrame(columns=FORECAST_COLUMNS), "naive"
 
+    engine = (engine or FORECAST_ENGINE).lower()
+    if engine == "prophet" and _prophet_class() is None:
+        engine = "ets"
     try:
-        m = Prophet() if _has_prophet else None
-        if m is None:
-            # Fallback: naive moving average projection
-            out = df.copy()
-            out = out.rename(columns={"date": "ds", "value": "y"})
-            out["ds"] = pd.to_datetime(out["ds"])  # ensure datetime
-            # Simple projection: last value flatline with slight noise band
-            last = float(out["y"].iloc[-1]) if not out.empty else 0.0
-            future_dates = pd.date_range(out["ds"].max(), periods=days+1, inclusive="right")
-            fdf = pd.DataFrame({"ds": future_dates})
-            fdf["yhat"] = last
-            fdf["yhat_lower"] = last * 0.98
-            fdf["yhat_upper"] = last * 1.02
-            return fdf[["ds", "yhat", "yhat_lower", "yhat_upper"]], False
-        m.fit(df.rename(columns={"date": "ds", "value": "y"}))
-        future = m.make_future_dataframe(periods=days)
-        forecast = m.predict(future)
-        return forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(days), True
+        if engine == "prophet":
+            return _prophet_forecast(df, days, series_key, background), "prophet"
+        if engine == "ets":
+            return _ets_batch({"series": df}, days)["series"], "ets"
+        # Fallback: naive moving average projection
+        return _naive_forecast(df, days), "naive"
     except Exception as e:
         logger.exception("Forecasting failed: %s", e)
         # Fallback
-        out = df.copy()
-        out = out.rename(columns={"date": "ds", "value": "y"})
-        out["ds"] = pd.to_datetime(out["ds"])  # ensure datetime
-        last = float(out["y"].iloc[-1]) if not out.empty else 0.0
-        future_dates = pd.date_range(out["ds"].max(), periods=days+1, inclusive="right")
-        fdf = pd.DataFrame({"ds": future_dates})
-        fdf["yhat"] = last
-        fdf["yhat_lower"] = last * 0.98
-        fdf["yhat_upper"] = last * 1.02
-        return fdf[["ds", "yhat", "yhat_lower", "yhat_upper"]], False
-
-
-def save_forecast_chart(forecast_df: pd.DataFrame, chart_path: str) -> str:
-    """Generate a simple PNG line chart using matplotlib and save to chart_path."""
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
+        return _naive_forecast(df, days), "naive"
+
+
+def preload() -> str:
+    """Import what the configured engine needs (Prophet, pandas) ahead of the first request."""
+    pd.DataFrame  # first attribute access imports pandas
+    if FORECAST_ENGINE == "prophet" and _prophet_class() is not None:
+        return "prophet"
+    return "ets" if FORECAST_ENGINE == "prophet" else FORECAST_ENGINE
+
+
+def forecast_cache_stats() -> Dict[str, int]:
+    with _models_lock:
+        return {"models": len(_models), "series": len(_last_good), "pending_fits": len(_pending), "maxsize": FORECAST_CACHE_SIZE}
+
+
+# Chart rendering settings; part of the chart cache key
+CHART_SETTINGS = {"figsize": (8, 3), "color": "blue", "alpha": 0.15, "grid_alpha": 0.2}
+_CHART_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("CHART_RENDER_WORKERS", "2")), thread_name_prefix="chart")
+_chart_jobs: Dict[str, object] = {}
+_chart_lock = threading.Lock()
+
+
+def chart_key(forecast_df: pd.DataFrame, settings: Optional[dict] = None) -> str:
+    """Content hash of the forecast points and render settings."""
+    h = hashlib.sha1(repr(sorted((settings or CHART_SETTINGS).items())).encode("utf-8"))
+    if forecast_df is not None and not forecast_df.empty:
+        cols = [c for c in FORECAST_COLUMNS if c in forecast_df.columns]
+        frame = forecast_df[cols].astype({"ds": str}) if "ds" in cols else forecast_df[cols]
+        h.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return h.hexdigest()[:20]
+
+
+def save_forecast_chart(forecast_df: pd.DataFrame, chart_path: str, settings: Optional[dict] = None) -> str:
+    """
+    Generate a simple PNG line chart using matplotlib and save to chart_path.
+    Uses the object-oriented Figure API (no pyplot global state), so it is safe to call from
+    several threads; the file is written to a temp name and renamed into place.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    settings = settings or CHART_SETTINGS
+    fig = Figure(figsize=settings["figsize"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
 
     if forecast_df is None or forecast_df.empty:
         # Create an empty placeholder chart
-        plt.figure(figsize=(8, 3))
-        plt.title('Forecast')
-        plt.savefig(chart_path, bbox_inches='tight')
-        plt.close()
-        return chart_path
-
-    plt.figure(figsize=(8, 3))
-    x = pd.to_datetime(forecast_df["ds"])  # type: ignore
-    y = forecast_df["yhat"]
-    yl = forecast_df.get("yhat_lower", y)
-    yu = forecast_df.get("yhat_upper", y)
-    plt.plot(x, y, label='yhat')
-    try:
-        plt.fill_between(x, yl, yu, color='blue', alpha=0.15, label='uncertainty')
-    except Exception:
-        pass
-    plt.legend(loc='best')
-    plt.grid(True, alpha=0.2)
-    plt.tight_layout()
-    os.makedirs(os.path.dirname(chart_path), exist_ok=True)
-    plt.savefig(chart_path, bbox_inches='tight')
-    plt.close()
+        ax.set_title('Forecast')
+    else:
+        x = pd.to_datetime(forecast_df["ds"])  # type: ignore
+        y = forecast_df["yhat"]
+        yl = forecast_df.get("yhat_lower", y)
+        yu = forecast_df.get("yhat_upper", y)
+        ax.plot(x, y, label='yhat')
+        try:
+            ax.fill_between(x, yl, yu, color=settings["color"], alpha=settings["alpha"], label='uncertainty')
+        except Exception:
+            pass
+        ax.legend(loc='best')
+        ax.grid(True, alpha=settings["grid_alpha"])
+        fig.tight_layout()
+    os.makedirs(os.path.dirname(chart_path) or ".", exist_ok=True)
+    tmp_path = f"{chart_path}.{threading.get_ident()}.tmp"
+    fig.savefig(tmp_path, bbox_inches='tight', format='png')
+    os.replace(tmp_path, chart_path)
     return chart_path
+
+
+def cached_forecast_chart(forecast_df: pd.DataFrame, chart_dir: str, settings: Optional[dict] = None) -> Tuple[str, bool]:
+    """
+    Content-addressed chart: returns (path, ready). The file is named by chart_key(), so an
+    existing file is reused as-is; otherwise rendering is queued on the chart worker pool
+    (once per key) and ready is False until it lands.
+    """
+    key = chart_key(forecast_df, settings)
+    path = os.path.join(chart_dir, f"forecast_{key}.png")
+    if os.path.exists(path):
+        return path, True
+
+    def run():
+        try:
+            with span("chart.render"), STAGE_LATENCY.time(stage="chart", engine="matplotlib"):
+                save_forecast_chart(forecast_df, path, settings)
+        except Exception as e:
+            logger.exception("Chart render failed for %s: %s", path, e)
+        finally:
+            with _chart_lock:
+                _chart_jobs.pop(key, None)
+
+    with _chart_lock:
+        if key not in _chart_jobs:
+            # a render that finishes while the request is still open shows up in its trace
+            _chart_jobs[key] = _CHART_POOL.submit(propagate(run))
+    return path, False
@@ -0,0 +1,91 @@
+import os
+import gzip
+import json
+import base64
+import hashlib
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+# Fast JSON with orjson, brotli with the brotli package; both are in requirements, and responses fall
+# back to stdlib json and gzip when either is missing
+try:
+    import orjson
+    _has_orjson = True
+except Exception:
+    _has_orjson = False
+
+try:
+    import brotli
+    _has_brotli = True
+except Exception:
+    _has_brotli = False
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+
+def dumps(payload) -> bytes:
+    if _has_orjson:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def encode_cursor(date: str, record_id: int) -> str:
+    """Opaque keyset cursor for the (date, id) position of the last record on a page."""
+    return base64.urlsafe_b64encode(f"{date}|{record_id}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; raises ValueError on anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        date, record_id = raw.rsplit("|", 1)
+        return date, int(record_id)
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+
+
+def _etag_matches(header: Optional[str], tag: str) -> bool:
+    # Weak comparison, as If-None-Match requires: ignore W/ and our per-encoding suffix
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"').split("-", 1)[0]
+        if candidate == tag:
+            return True
+    return False
+
+
+def json_response(request: Request, payload, status_code: int = 200) -> Response:
+    """
+    Serialize payload once and answer conditionally: a strong ETag from the body hash,
+    304 when If-None-Match matches, otherwise the body, brotli- or gzip-compressed when
+    it is large enough and the client accepts it.
+    """
+    body = dumps(payload)
+    tag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        accept = request.headers.get("accept-encoding", "")
+        if _has_brotli and "br" in accept:
+            encoding = "br"
+        elif "gzip" in accept:
+            encoding = "gzip"
+    # Strong validators must differ per representation, so encoded bodies get a suffixed tag
+    headers = {
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "ETag": f'"{tag}-{encoding}"' if encoding else f'"{tag}"',
+    }
+    if status_code == 200 and _etag_matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,50 @@
+import time
+import importlib
+import threading
+from typing import Dict
+
+# Heavy optional or rarely needed dependencies are bound to a LazyModule and imported on first
+# attribute access (in the warm-up thread, normally) instead of at `import backend.app`.
+
+_import_seconds: Dict[str, float] = {}
+
+
+class LazyModule:
+    """Stand-in for a module that imports it, once and thread-safely, on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                t0 = time.perf_counter()
+                self._module = importlib.import_module(self._name)
+                _import_seconds[self._name] = round(time.perf_counter() - t0, 4)
+        return self._module
+
+    def __getattr__(self, attr):
+        module = self._module if self._module is not None else self._load()
+        return getattr(module, attr)
+
+    def __setattr__(self, attr, value):
+        # module configuration such as `openai.api_key = ...` must reach the real module
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._module if self._module is not None else self._load(), attr, value)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def import_times() -> Dict[str, float]:
+    """Seconds spent importing each lazy module so far."""
+    return dict(_import_seconds)
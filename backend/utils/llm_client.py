@@ -1,15 +1,21 @@
 import os
 import io
+import time
+import hashlib
 import logging
-from typing import Dict
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
+from .settings import SETTINGS
+from .cache import TTLCache
+from .lazy import lazy_import
+from .metrics import STAGE_LATENCY
+from .tracing import span, propagate
 
-try:
-    import openai  # type: ignore
-except Exception:
-    openai = None  # graceful degradation
+# openai (and the HTTP stack it pulls in) is imported on the first LLM call; without it, graceful degradation
+openai = lazy_import("openai") if importlib.util.find_spec("openai") is not None else None
 
 logger = logging.getLogger("llm")
 
@@ -18,36 +24,207 @@ SYSTEM_PROMPT = (
     "Write in bullet points, focus on product moves, partnerships, funding, risks, and opportunities."
 )
 
+# Insights keyed by (company, domain, hash of the input headlines)
+INSIGHTS_CACHE = TTLCache(
+    maxsize=int(os.getenv("INSIGHTS_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("INSIGHTS_CACHE_TTL_SECONDS", "1800")),
+    name="insights",
+)
+# Bound concurrent LLM calls; callers that cannot get a slot in time use the template
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
 
-def generate_insights(texts, company: str = "", domain: str = "") -> str:
-    """
-    Generate insights using OpenAI if OPENAI_API_KEY present. Fallback: template-based summarizer.
-    """
-    api_key = os.getenv('OPENAI_API_KEY', '')
-    if openai and api_key:
+
+def insights_key(texts, company: str = "", domain: str = "") -> Tuple[str, str, str]:
+    digest = hashlib.sha1("\n".join(t[:300] for t in texts[:20]).encode("utf-8")).hexdigest()
+    return (company.lower(), domain, digest)
+
+
+def _prompt(texts, company: str, domain: str) -> str:
+    return f"Domain: {domain}\nCompany: {company}\nGiven the following items, summarize top insights as 6 bullets.\n" + "\n".join([f"- {t[:300]}" for t in texts[:20]])
+
+
+def _messages(texts, company: str, domain: str) -> List[Dict]:
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": _prompt(texts, company, domain)}]
+
+
+def _template(texts) -> str:
+    # Fallback template
+    bullets = []
+    for i, t in enumerate(texts[:6], start=1):
+        bullets.append(f"- [{i}] {t[:140]}...")
+    if not bullets:
+        bullets = ["- No recent items available. Using local CSV fallback."]
+    return "\n".join(bullets)
+
+
+def _set_api_base() -> None:
+    # OPENAI_BASE_URL redirects the SDK (e.g. to a proxy or the bench stub); unset keeps its default
+    base = SETTINGS.get("OPENAI_BASE_URL")
+    if base:
+        openai.api_base = base.rstrip("/")
+
+
+def _llm_enabled() -> bool:
+    return bool(openai and SETTINGS.get('OPENAI_API_KEY'))
+
+
+def _generate(texts, company: str, domain: str) -> Tuple[str, bool]:
+    """Returns (text, from_llm)."""
+    t0 = time.perf_counter()
+    with span("insights.generate", texts=len(texts)) as s:
+        text, from_llm = _generate_uninstrumented(texts, company, domain)
+        s["engine"] = "llm" if from_llm else "template"
+    STAGE_LATENCY.observe(time.perf_counter() - t0, stage="insights", engine="llm" if from_llm else "template")
+    return text, from_llm
+
+
+def _generate_uninstrumented(texts, company: str, domain: str) -> Tuple[str, bool]:
+    if _llm_enabled():
+        if not _llm_slots.acquire(timeout=LLM_QUEUE_TIMEOUT):
+            logger.warning("All %d LLM slots busy, using template fallback", LLM_MAX_CONCURRENCY)
+            return _template(texts), False
         try:
-            openai.api_key = api_key
+            openai.api_key = SETTINGS.get('OPENAI_API_KEY')
+            _set_api_base()
             # Use responses API (compatible with >=2024-xx SDK) or chat.completions as available
             # NOTE: Keep simple to avoid version pitfalls
-            prompt = f"Domain: {domain}\nCompany: {company}\nGiven the following items, summarize top insights as 6 bullets.\n" + "\n".join([f"- {t[:300]}" for t in texts[:20]])
-            # Try Chat Completions
-            try:
+            with span("llm.request"):
                 resp = openai.ChatCompletion.create(
                     model="gpt-3.5-turbo",
-                    messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}],
+                    messages=_messages(texts, company, domain),
                     temperature=0.3,
                     max_tokens=500,
                 )
-                return resp.choices[0].message.get("content", "").strip()
-            except Exception:
-                pass
-            # If the SDK variant differs, fallback to a minimal manual format
+            return resp.choices[0].message.get("content", "").strip(), True
         except Exception as e:
             logger.warning("OpenAI call failed, using template fallback: %s", e)
-    # Fallback template
-    bullets = []
-    for i, t in enumerate(texts[:6], start=1):
-        bullets.append(f"- [{i}] {t[:140]}...")
-    if not bullets:
-        bullets = ["- No recent items available. Using local CSV fallback."]
-    return "\n".join(bullets)
+        finally:
+            _llm_slots.release()
+    return _template(texts), False
+
+
+def generate_insights(texts, company: str = "", domain: str = "") -> str:
+    """
+    Generate insights using OpenAI if OPENAI_API_KEY present. Fallback: template-based summarizer.
+    LLM results are cached by (company, domain, headline hash); concurrent identical requests
+    share one call.
+    """
+    text, _ = INSIGHTS_CACHE.get_or_load(
+        insights_key(texts, company, domain),
+        lambda: _generate(texts, company, domain),
+        cacheable=lambda res: res[1],
+    )
+    return text
+
+
+class _InsightStream:
+    """One in-flight LLM stream. Readers replay the parts produced so far, then follow it live."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def push(self, piece: str) -> None:
+        with self._cond:
+            self.parts.append(piece)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def follow(self) -> Iterator[str]:
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.parts) and not self.finished:
+                    self._cond.wait()
+                new, done = self.parts[i:], self.finished
+            i += len(new)
+            yield from new
+            if done:
+                return
+
+
+# In-flight streams by insights_key; concurrent identical requests read the same producer
+_streams: Dict[Tuple[str, str, str], _InsightStream] = {}
+_streams_lock = threading.Lock()
+# Producers run here, so a client disconnecting mid-stream never cuts the output short for the others
+_STREAM_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_STREAM_WORKERS", "8")), thread_name_prefix="llm-stream")
+
+TRUNCATED_MARKER = "\n\n[LLM output was cut off; template summary follows]\n"
+
+
+def _produce(key, stream: _InsightStream, texts, company: str, domain: str) -> None:
+    parts: List[str] = []
+    try:
+        if not _llm_slots.acquire(timeout=LLM_QUEUE_TIMEOUT):
+            logger.warning("All %d LLM slots busy, using template fallback", LLM_MAX_CONCURRENCY)
+        else:
+            t0 = time.perf_counter()
+            try:
+                openai.api_key = SETTINGS.get('OPENAI_API_KEY')
+                _set_api_base()
+                with span("llm.request", stream=True):
+                    chunks = openai.ChatCompletion.create(
+                        model="gpt-3.5-turbo",
+                        messages=_messages(texts, company, domain),
+                        temperature=0.3,
+                        max_tokens=500,
+                        stream=True,
+                    )
+                for chunk in chunks:
+                    piece = (chunk["choices"][0].get("delta") or {}).get("content")
+                    if piece:
+                        parts.append(piece)
+                        stream.push(piece)
+                STAGE_LATENCY.observe(time.perf_counter() - t0, stage="insights", engine="llm_stream")
+                # cached before the stream is unregistered, so a late identical request finds one or the other
+                with _streams_lock:
+                    INSIGHTS_CACHE.set(key, ("".join(parts).strip(), True))
+                    _streams.pop(key, None)
+                return
+            except Exception as e:
+                logger.warning("OpenAI stream failed, using template fallback: %s", e)
+                if parts:
+                    stream.push(TRUNCATED_MARKER)
+            finally:
+                _llm_slots.release()
+        for line in _template(texts).split("\n"):
+            stream.push(line + "\n")
+    finally:
+        with _streams_lock:
+            _streams.pop(key, None)
+        stream.finish()
+
+
+def stream_insights(texts, company: str = "", domain: str = "") -> Iterator[str]:
+    """
+    Yield insight text chunks as the LLM produces them. Cached results are yielded in one piece;
+    the template fallback is yielded line by line. Concurrent identical requests share one LLM
+    stream, and completed LLM output is cached. A stream that fails part-way is followed by
+    TRUNCATED_MARKER and the template.
+    """
+    key = insights_key(texts, company, domain)
+    if not _llm_enabled():
+        cached = INSIGHTS_CACHE.get(key)
+        if cached is not None:
+            yield cached[0]
+            return
+        for line in _template(texts).split("\n"):
+            yield line + "\n"
+        return
+    with _streams_lock:
+        cached = INSIGHTS_CACHE.get(key)
+        stream = None if cached is not None else _streams.get(key)
+        if cached is None and stream is None:
+            stream = _streams[key] = _InsightStream()
+            _STREAM_POOL.submit(propagate(_produce), key, stream, texts, company, domain)
+    if cached is not None:
+        yield cached[0]
+        return
+    yield from stream.follow()
@@ -0,0 +1,213 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Minimal Prometheus instrumentation with no client library: counters and histograms keyed by
+# label values, plus gauges and totals read from callbacks at scrape time. Recording a sample is
+# a dict lookup, a bisect and a couple of additions under a per-metric lock.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {s[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(s[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {s[-1]}")
+        return lines
+
+
+class Gauge:
+    """Values computed at scrape time: callback() -> [(labels dict, value), ...]."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name, self.help, self.callback = name, help, callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.callback():
+            if value is None:
+                continue
+            names = tuple(labels)
+            lines.append(f"{self.name}{_fmt_labels(names, tuple(labels[n] for n in names))} {_fmt_value(float(value))}")
+        return lines
+
+
+class CallbackCounter(Gauge):
+    """Monotonic totals kept elsewhere (e.g. by a cache) and read at scrape time; exposed as counters so rate() works."""
+
+    kind = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, callback) -> Gauge:
+        with self._lock:
+            # callbacks may be re-registered (e.g. on reload); the latest wins
+            self._metrics[name] = Gauge(name, help, callback)
+            return self._metrics[name]
+
+    def callback_counter(self, name: str, help: str, callback) -> CallbackCounter:
+        with self._lock:
+            self._metrics[name] = CallbackCounter(name, help, callback)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            try:
+                lines.extend(m.render())
+            except Exception as e:
+                lines.append(f"# {m.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Shared metrics, recorded from the modules that do the work
+HTTP_LATENCY = REGISTRY.histogram("insightiq_http_request_duration_seconds",
+                                  "Time to response start per route", ("method", "route", "status"))
+PROVIDER_CALLS = REGISTRY.counter("insightiq_provider_requests_total",
+                                  "Provider HTTP attempts by outcome (ok, http_429, http_error, error, circuit_open, rate_limited)",
+                                  ("provider", "outcome"))
+PROVIDER_LATENCY = REGISTRY.histogram("insightiq_provider_request_duration_seconds",
+                                      "Provider HTTP attempt latency", ("provider",))
+SOURCE_TAGS = REGISTRY.counter("insightiq_source_total",
+                               "Source tags returned by fetchers and endpoints (api:*, store, fallback:*)", ("stage", "source"))
+STAGE_LATENCY = REGISTRY.histogram("insightiq_stage_duration_seconds",
+                                   "Time spent in sentiment, forecast, chart and LLM stages", ("stage", "engine"))
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request to its response start, labelled by the
+    matched route template (never the raw path, so cardinality stays bounded).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = {"code": 500, "recorded": False}
+
+        def record():
+            if not status["recorded"]:
+                status["recorded"] = True
+                route = scope.get("route")
+                HTTP_LATENCY.observe(time.perf_counter() - t0, method=scope.get("method", ""),
+                                     route=getattr(route, "path", "unmatched"), status=status["code"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                record()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
+
+
+def render() -> str:
+    return REGISTRY.render()
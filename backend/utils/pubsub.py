@@ -0,0 +1,89 @@
+import os
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("pubsub")
+
+Topic = Tuple[str, str]  # (domain, company); company "" is the whole domain
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "100"))
+
+
+class Subscription:
+    """One client's view of a topic: an asyncio queue on the client's event loop."""
+
+    def __init__(self, topic: Topic, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.topic = topic
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # Set when deltas had to be dropped; the client should refetch instead of trusting the stream
+        self.lagged = False
+
+    def _put(self, message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout: float):
+        """Next message, or None after `timeout` seconds of silence."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    """
+    In-process pub/sub fan-out. Subscribers are coroutines parked on their own queue, so an idle
+    connection costs a queue and a dict entry, no thread. publish() may be called from any thread
+    (the ingest pool); delivery is handed to each subscriber's loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics: Dict[Topic, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topic: Topic, loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        sub = Subscription(topic, loop or asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._topics.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[sub.topic]
+
+    def publish(self, topic: Topic, message) -> int:
+        """Deliver message to every subscriber of topic; returns how many there were."""
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        self.published += 1
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._put, message)
+            except RuntimeError:
+                # the subscriber's loop is closed; it will be unsubscribed when its stream ends
+                continue
+        self.delivered += len(subs)
+        return len(subs)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            topics = {f"{d}:{c}" if c else d: len(s) for (d, c), s in self._topics.items()}
+        return {"subscribers": sum(topics.values()), "topics": topics, "published": self.published, "delivered": self.delivered}
+
+
+def record_topics(domain: str, company: str, record: dict) -> List[Topic]:
+    """Topics a stored record belongs to: its domain plus every company it was fetched for or mentions."""
+    companies = dict.fromkeys(([company] if company else []) + list(record.get("companies") or []))
+    return [(domain, "")] + [(domain, c) for c in companies]
@@ -0,0 +1,127 @@
+import os
+import zlib
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .text import STOP_WORDS, normalize_words
+
+logger = logging.getLogger("relevance")
+
+# Offline relevance scoring, standing in for the notebook's sentence-transformers/spaCy filter.
+# Each domain is a bag of topic words (its keywords plus competitor names). A headline is scored
+# by the IDF-weighted share of its words that fall in that bag, with words hashed into a fixed-width
+# vector so a whole batch is scored with a handful of NumPy operations and no model download.
+
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.1"))
+N_FEATURES = 1 << 16
+
+DOMAIN_KEYWORDS: Dict[str, List[str]] = {
+    "ai-ml": ["ai", "artificial", "intelligence", "machine", "learning", "model", "llm", "gpt", "chatbot",
+              "neural", "training", "inference", "generative", "agent", "dataset", "benchmark", "transformer",
+              "alignment", "safety", "research", "claude", "gemini", "diffusion", "multimodal", "reasoning"],
+    "cloud-saas": ["cloud", "saas", "software", "subscription", "datacenter", "data", "center", "server",
+                   "serverless", "kubernetes", "compute", "storage", "region", "outage", "crm", "erp",
+                   "database", "hosting", "infrastructure", "migration", "enterprise", "platform"],
+    "cybersecurity": ["security", "cyber", "cybersecurity", "breach", "hack", "hacker", "ransomware",
+                      "malware", "vulnerability", "exploit", "firewall", "threat", "attack", "phishing",
+                      "privacy", "zero", "trust", "patch", "ddos", "endpoint", "encryption", "cve"],
+    "web3": ["crypto", "cryptocurrency", "blockchain", "bitcoin", "ethereum", "token", "nft", "defi",
+             "web3", "wallet", "exchange", "stablecoin", "etf", "sec", "mining", "ledger", "chain",
+             "smart", "contract", "layer", "rollup"],
+    "ar-vr": ["ar", "vr", "xr", "augmented", "virtual", "reality", "mixed", "headset", "metaverse",
+              "quest", "glasses", "immersive", "spatial", "display", "game", "gaming", "avatar", "haptic"],
+    "robotics": ["robot", "robotic", "robotics", "automation", "automate", "humanoid", "autonomous",
+                 "industrial", "factory", "manufacturing", "cobot", "warehouse", "drone", "rpa",
+                 "actuator", "arm", "vacuum", "machine"],
+    "semiconductors": ["chip", "chipmaker", "semiconductor", "gpu", "cpu", "processor", "wafer", "foundry",
+                       "fab", "nm", "node", "silicon", "hardware", "memory", "export", "accelerator",
+                       "datacenter", "ai", "supply", "packaging"],
+    "quantum": ["quantum", "qubit", "qubits", "computing", "computer", "annealing", "superconducting",
+                "photonic", "error", "correction", "entanglement", "processor", "algorithm",
+                "cryptography", "physics", "supremacy", "advantage"],
+    "consumer-electronics": ["phone", "smartphone", "iphone", "galaxy", "tv", "television", "laptop",
+                             "tablet", "wearable", "watch", "earbud", "headphone", "camera", "console",
+                             "playstation", "device", "gadget", "launch", "appliance", "oled", "display"],
+    "green-energy": ["energy", "solar", "wind", "offshore", "battery", "storage", "renewable", "grid",
+                     "power", "electric", "ev", "turbine", "hydrogen", "clean", "climate", "carbon",
+                     "emission", "inverter", "panel", "utility", "megawatt", "gigawatt"],
+}
+
+# Beyond the shared stop words, reporting verbs and fillers say nothing about the topic
+_STOP = STOP_WORDS | frozenset("after over into says said will more than has have".split())
+
+
+def _words(text: str) -> List[str]:
+    return normalize_words(text, _STOP)
+
+
+def _hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8")) & (N_FEATURES - 1)
+
+
+class RelevanceScorer:
+    """
+    Hashed TF-IDF relevance against per-domain topic vectors.
+    score() returns, per text, the IDF-weighted share of its words that are on topic for the domain
+    (0..1); filter() drops records below the threshold and annotates the rest with "relevance".
+    """
+
+    def __init__(self, domain_terms: Dict[str, Iterable[str]]):
+        docs = {d: {_hash(w) for t in terms for w in _words(t)} for d, terms in domain_terms.items()}
+        n = len(docs)
+        df = np.zeros(N_FEATURES)
+        for cols in docs.values():
+            df[list(cols)] += 1
+        # words shared by many domains ("data", "ai") say less about any one of them
+        self.idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        self.centroids: Dict[str, np.ndarray] = {}
+        for d, cols in docs.items():
+            c = np.zeros(N_FEATURES, dtype=np.float32)
+            c[list(cols)] = 1.0
+            self.centroids[d] = c
+
+    @classmethod
+    def from_domains(cls, domains: Dict[str, dict], aliases: Optional[Dict[str, List[str]]] = None) -> "RelevanceScorer":
+        """Topic vectors from DOMAIN_KEYWORDS plus each domain's name, competitors and their aliases."""
+        aliases = aliases or {}
+        terms = {}
+        for slug, meta in domains.items():
+            terms[slug] = list(DOMAIN_KEYWORDS.get(slug, [])) + [meta.get("name", "")]
+            for company in meta.get("competitors", []):
+                terms[slug] += [company] + list(aliases.get(company, []))
+        return cls(terms)
+
+    def score(self, domain: str, texts: List[str]) -> np.ndarray:
+        centroid = self.centroids.get(domain)
+        if centroid is None or not texts:
+            return np.ones(len(texts))
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for w in _words(text):
+                rows.append(i)
+                cols.append(_hash(w))
+        if not cols:
+            return np.zeros(len(texts))
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        w = self.idf[cols]
+        on_topic = np.bincount(rows, weights=w * centroid[cols], minlength=len(texts))
+        total = np.bincount(rows, weights=w, minlength=len(texts))
+        return np.divide(on_topic, total, out=np.zeros(len(texts)), where=total > 0)
+
+    def filter(self, domain: str, records: List[dict], threshold: float = RELEVANCE_THRESHOLD) -> List[dict]:
+        """Records scoring at least threshold for domain, each annotated with its score.
+        Unknown domains pass everything through."""
+        if domain not in self.centroids or not records:
+            return records
+        scores = self.score(domain, [r.get("headline") or "" for r in records])
+        kept = []
+        for r, s in zip(records, scores):
+            if s >= threshold:
+                r["relevance"] = round(float(s), 3)
+                kept.append(r)
+        if len(kept) < len(records):
+            logger.debug("Relevance filter dropped %d/%d records for %s", len(records) - len(kept), len(records), domain)
+        return kept
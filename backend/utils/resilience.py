@@ -0,0 +1,187 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Tuple
+
+logger = logging.getLogger("resilience")
+
+# Provider quotas as (calls, period_seconds, burst), defaulting to the free tiers.
+# Override with {PROVIDER}_QUOTA="calls/seconds" and {PROVIDER}_BURST.
+DEFAULT_QUOTAS: Dict[str, Tuple[float, float, float]] = {
+    "gnews": (100, 86400, 10),
+    "serpapi": (100, 30 * 86400, 5),
+    "twitter": (450, 900, 20),
+    "reddit": (10, 60, 5),
+    "finnhub": (60, 60, 10),
+    "alphavantage": (25, 86400, 5),
+    "default": (60, 60, 10),
+}
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "60"))
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling a provider that is rate limited or whose circuit is open."""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} unavailable: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class RetryLater(ProviderUnavailable):
+    """
+    A provider call failed in a way worth repeating (429, 5xx, timeout). The provider's limiter is
+    paused for `delay` seconds; the caller re-queues the call for `not_before` instead of sleeping.
+    """
+
+    def __init__(self, provider: str, delay: float):
+        super().__init__(provider, "retry_later")
+        self.delay = delay
+        self.not_before = time.monotonic() + delay
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return False
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def pause(self, seconds: float) -> None:
+        """Refuse all calls for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures.
+    open -> half-open once `cooldown` seconds have passed; a single probe call is let through.
+    half-open -> closed on probe success, back to open on probe failure.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0, name: str = ""):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self.state = "half-open"
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Circuit for %s opened after %d failures", self.name or "provider", self.failures)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def quota(provider: str) -> Tuple[float, float, float]:
+    """(calls, period_seconds, burst) for provider."""
+    calls, period, burst = DEFAULT_QUOTAS.get(provider, DEFAULT_QUOTAS["default"])
+    raw = os.getenv(f"{provider.upper()}_QUOTA", "")
+    if raw:
+        try:
+            c, p = raw.split("/", 1)
+            calls, period = float(c), float(p)
+        except ValueError:
+            logger.warning("Ignoring malformed %s_QUOTA=%r (expected calls/seconds)", provider.upper(), raw)
+    burst = float(os.getenv(f"{provider.upper()}_BURST", burst))
+    return calls, period, burst
+
+
+def get_limiter(provider: str) -> TokenBucket:
+    lim = _limiters.get(provider)
+    if lim is None:
+        with _registry_lock:
+            lim = _limiters.get(provider)
+            if lim is None:
+                calls, period, burst = quota(provider)
+                lim = _limiters[provider] = TokenBucket(rate=calls / period, capacity=burst)
+    return lim
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    br = _breakers.get(provider)
+    if br is None:
+        with _registry_lock:
+            br = _breakers.get(provider)
+            if br is None:
+                br = _breakers[provider] = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, name=provider)
+    return br
+
+
+def provider_status() -> Dict[str, dict]:
+    """Snapshot of limiter tokens and breaker state for every provider seen so far."""
+    out = {}
+    for name in sorted(set(_limiters) | set(_breakers)):
+        lim, br = _limiters.get(name), _breakers.get(name)
+        out[name] = {
+            "tokens": round(lim.tokens, 2) if lim else None,
+            "circuit": br.state if br else "closed",
+            "failures": br.failures if br else 0,
+        }
+    return out
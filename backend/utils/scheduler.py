@@ -0,0 +1,140 @@
+import time
+import heapq
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .resilience import RetryLater, quota
+
+logger = logging.getLogger("scheduler")
+
+Target = Tuple[str, str]  # (domain, company)
+
+
+class IngestScheduler:
+    """
+    Background poller. Each provider walks the (domain, company) targets round-robin at its own
+    pace, derived from its quota: one poll every period / (calls * quota_share) seconds, never
+    faster than min_interval. Polls for different providers run concurrently, at most one in
+    flight per provider. A poll that fails with RetryLater is repeated for the same target once the
+    provider's not-before time has passed (at most max_retries times) instead of sleeping on a worker.
+
+    jobs: provider -> fn(company, domain) returning records
+    sink: fn(domain, company, provider, records) storing them; returns the number of new records
+    """
+
+    def __init__(self, targets: List[Target], jobs: Dict[str, Callable[[str, str], List[dict]]],
+                 sink: Callable[[str, str, str, List[dict]], int], quota_share: float = 0.8, min_interval: float = 5.0,
+                 max_retries: int = 2):
+        self.targets = list(targets)
+        self.jobs = dict(jobs)
+        self.sink = sink
+        self.intervals = {p: max(min_interval, self._quota_interval(p, quota_share)) for p in self.jobs}
+        self._cursor = {p: 0 for p in self.jobs}
+        self.max_retries = max_retries
+        self._inflight: Dict[str, object] = {}
+        # provider -> (target, not_before, attempt) of a poll to repeat
+        self._retries: Dict[str, Tuple[Target, float, int]] = {}
+        self._lock = threading.Lock()  # guards _retries and stats; polls run on worker threads
+        self._heap: List[Tuple[float, str]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.jobs)), thread_name_prefix="ingest")
+        self.stats = {p: {"polls": 0, "records": 0, "new": 0, "errors": 0, "retries": 0, "last_poll": None, "last_target": None}
+                      for p in self.jobs}
+
+    @staticmethod
+    def _quota_interval(provider: str, share: float) -> float:
+        calls, period, _ = quota(provider)
+        return period / max(calls * share, 1e-9)
+
+    def start(self) -> None:
+        if self._thread is not None or not self.jobs or not self.targets:
+            return
+        now = time.monotonic()
+        # Stagger provider start times so the first polls do not all land at once
+        self._heap = [(now + i, p) for i, p in enumerate(sorted(self.jobs))]
+        heapq.heapify(self._heap)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Ingest scheduler started: %d targets, intervals %s", len(self.targets),
+                    {p: round(i, 1) for p, i in self.intervals.items()})
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            due, provider = self._heap[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            heapq.heappop(self._heap)
+            with self._lock:
+                retry = self._retries.get(provider)
+            if retry is not None and retry[1] > time.monotonic():
+                # the provider asked for a pause; nothing is sent to it before then
+                heapq.heappush(self._heap, (retry[1], provider))
+                continue
+            running = self._inflight.get(provider)
+            if running is None or running.done():
+                if retry is not None:
+                    with self._lock:
+                        self._retries.pop(provider, None)
+                    target, attempt = retry[0], retry[2]
+                else:
+                    target, attempt = self.targets[self._cursor[provider] % len(self.targets)], 0
+                    self._cursor[provider] += 1
+                self._inflight[provider] = self._pool.submit(self.poll, provider, target, attempt)
+            # Schedule from now rather than from `due` so a stall never turns into a burst
+            heapq.heappush(self._heap, (time.monotonic() + self.intervals[provider], provider))
+
+    def poll(self, provider: str, target: Target, attempt: int = 0) -> int:
+        """Fetch one target from one provider and hand the records to the sink."""
+        domain, company = target
+        with self._lock:
+            st = self.stats[provider]
+            st["polls"] += 1
+            st["last_poll"] = time.time()
+            st["last_target"] = f"{domain}:{company}"
+        try:
+            rows = self.jobs[provider](company, domain)
+            new = self.sink(domain, company, provider, rows) if rows else 0
+            self._count(provider, records=len(rows), new=new)
+            return new
+        except RetryLater as e:
+            if attempt < self.max_retries:
+                self._count(provider, retries=1)
+                with self._lock:
+                    self._retries[provider] = (target, e.not_before, attempt + 1)
+            else:
+                self._count(provider, retries=1, errors=1)
+                logger.warning("Ingest poll %s for %s:%s gave up after %d retries", provider, domain, company, attempt)
+            return 0
+        except Exception as e:
+            self._count(provider, errors=1)
+            logger.exception("Ingest poll %s for %s:%s failed: %s", provider, domain, company, e)
+            return 0
+
+    def _count(self, provider: str, **deltas: int) -> None:
+        with self._lock:
+            st = self.stats[provider]
+            for name, n in deltas.items():
+                st[name] += n
+
+    def status(self) -> Dict:
+        with self._lock:
+            providers = {p: dict(st) for p, st in self.stats.items()}
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "targets": len(self.targets),
+            "intervals": {p: round(i, 1) for p, i in self.intervals.items()},
+            "providers": providers,
+        }
@@ -1,46 +1,108 @@
-import os
-from typing import Tuple
-
-# Env loader snippet
-from dotenv import load_dotenv
-import os as _os
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
-
-# Try VADER, fallback to heuristic
-try:
-    from nltk.sentiment.vader import SentimentIntensityAnalyzer  # type: ignore
-    _sia = SentimentIntensityAnalyzer()
-    _has_vader = True
-except Exception:
-    _has_vader = False
+import re
+import hashlib
+import threading
+import importlib.util
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .settings import SETTINGS
+from .cache import TTLCache
+from .metrics import STAGE_LATENCY
+from .tracing import span
+
+# Try VADER, fallback to heuristic. nltk and the VADER lexicon load on first use, not at import
+_sia = None
+_has_vader = importlib.util.find_spec("nltk") is not None
+_sia_lock = threading.Lock()
+
+
+def _analyzer():
+    global _sia, _has_vader
+    if _sia is None and _has_vader:
+        with _sia_lock:
+            if _sia is None and _has_vader:
+                try:
+                    from nltk.sentiment.vader import SentimentIntensityAnalyzer  # type: ignore
+                    _sia = SentimentIntensityAnalyzer()
+                except Exception:
+                    _has_vader = False
+    return _sia
 
 POS_WORDS = {"good","great","excellent","positive","win","advantage","improve","success","growth","beat","upgrade"}
 NEG_WORDS = {"bad","fail","loss","negative","drop","bug","vulnerability","delay","lawsuit","attack","downgrade"}
 
+# Substring alternations: one regex scan per text instead of one `in` test per word
+_POS_RE = re.compile("|".join(sorted(map(re.escape, POS_WORDS))))
+_NEG_RE = re.compile("|".join(sorted(map(re.escape, NEG_WORDS))))
 
-def run_sentiment(text: str) -> Tuple[str, float]:
-    if not text or not str(text).strip():
-        return "neutral", 0.0
-    if _has_vader:
+# Scores keyed by a digest of the text; headlines repeat across requests and backfills
+SENTIMENT_CACHE = TTLCache(maxsize=SETTINGS.get_int("SENTIMENT_CACHE_SIZE", 200000), ttl=float("inf"), name="sentiment")
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _label(score: float) -> str:
+    if score > 0.2:
+        return "positive"
+    if score < -0.2:
+        return "negative"
+    return "neutral"
+
+
+def _keyword_scores(texts: Sequence[str]) -> np.ndarray:
+    lowered = [t.lower() for t in texts]
+    pos = np.fromiter((_POS_RE.search(t) is not None for t in lowered), dtype=bool, count=len(lowered))
+    neg = np.fromiter((_NEG_RE.search(t) is not None for t in lowered), dtype=bool, count=len(lowered))
+    return np.select([pos & ~neg, neg & ~pos], [0.3, -0.3], default=0.0)
+
+
+def _vader_scores(sia, texts: Sequence[str]) -> np.ndarray:
+    out = np.zeros(len(texts))
+    for i, t in enumerate(texts):
         try:
-            score = float(_sia.polarity_scores(str(text))['compound'])
+            out[i] = float(sia.polarity_scores(t)['compound'])
         except Exception:
-            score = 0.0
-    else:
-        t = str(text).lower()
-        pos = any(w in t for w in POS_WORDS)
-        neg = any(w in t for w in NEG_WORDS)
-        if pos and not neg:
-            score = 0.3
-        elif neg and not pos:
-            score = -0.3
+            out[i] = 0.0
+    return out
+
+
+def run_sentiment_batch(texts: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    Score many texts at once. Inputs are deduplicated and looked up in SENTIMENT_CACHE first,
+    so the cost is proportional to the number of distinct, previously unseen texts.
+    Returns one (label, score) per input, in order.
+    """
+    resolved = {}  # input text -> (label, score)
+    todo = {}  # digest -> input text, distinct and not cached
+    for text in dict.fromkeys(texts):
+        if not text or not str(text).strip():
+            continue
+        key = _text_key(str(text))
+        hit = SENTIMENT_CACHE.get(key)
+        if hit is None:
+            todo[key] = text
         else:
-            score = 0.0
-    # Map to label
-    if score > 0.2:
-        label = "positive"
-    elif score < -0.2:
-        label = "negative"
-    else:
-        label = "neutral"
-    return label, score
+            resolved[text] = hit
+    if todo:
+        distinct = [str(t) for t in todo.values()]
+        sia = _analyzer()
+        engine = "vader" if sia is not None else "keywords"
+        with span("sentiment", engine=engine, texts=len(distinct)), STAGE_LATENCY.time(stage="sentiment", engine=engine):
+            scores = _vader_scores(sia, distinct) if sia is not None else _keyword_scores(distinct)
+        for (key, text), score in zip(todo.items(), scores.tolist()):
+            resolved[text] = (_label(score), score)
+            SENTIMENT_CACHE.set(key, resolved[text])
+    neutral = ("neutral", 0.0)
+    return [resolved.get(t, neutral) for t in texts]
+
+
+def run_sentiment(text: str) -> Tuple[str, float]:
+    return run_sentiment_batch([text])[0]
+
+
+def preload() -> str:
+    """Load the sentiment model ahead of the first request; returns "vader" or "keywords"."""
+    return "vader" if _analyzer() is not None else "keywords"
@@ -0,0 +1,48 @@
+import os
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger("settings")
+
+ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+
+
+class Settings:
+    """
+    Process configuration. backend/.env is read once, on first import, into os.environ (variables
+    already set in the environment win), so module-level os.getenv constants everywhere see it.
+    Modules import SETTINGS instead of calling load_dotenv themselves.
+    """
+
+    def __init__(self, env_path: str = ENV_PATH):
+        self.env_path = env_path
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "Settings":
+        with self._lock:
+            if not self.loaded:
+                try:
+                    from dotenv import load_dotenv
+                    load_dotenv(dotenv_path=self.env_path, override=False)
+                except Exception as e:
+                    logger.warning("Could not load %s: %s", self.env_path, e)
+                self.loaded = True
+        return self
+
+    def get(self, key: str, default: Optional[str] = "") -> Optional[str]:
+        return os.getenv(key, default)
+
+    def get_int(self, key: str, default: int) -> int:
+        return int(os.getenv(key, default))
+
+    def get_float(self, key: str, default: float) -> float:
+        return float(os.getenv(key, default))
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        raw = os.getenv(key)
+        return default if raw is None else raw.lower() in ("1", "true", "yes")
+
+
+SETTINGS = Settings().load()
@@ -0,0 +1,321 @@
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("store")
+
+# Record kind per provider tag, so /api/news and /api/social can read their own slice.
+# Rows imported from the domain CSVs are kind "archive".
+PROVIDER_KINDS = {
+    "gnews": "news",
+    "serp": "news",
+    "serpapi": "news",
+    "finnhub": "news",
+    "alphavantage": "news",
+    "twitter": "social",
+    "reddit": "social",
+    "reddit_public": "social",
+    "csv": "archive",
+}
+
+# cluster_size: copies of the story seen at ingest (syndicated or re-posted), the record itself included
+RECORD_FIELDS = ["date", "headline", "source", "sentiment", "sentiment_score", "link", "provider", "cluster_size"]
+# Returned by reads; the id is the tie-breaker of the (date, id) keyset used for cursor pagination
+RECORD_COLUMNS = ["id"] + RECORD_FIELDS
+
+# Bumped whenever SCHEMA changes incompatibly; a store written under another version is dropped and
+# rebuilt (ingestion refills it and the domain CSVs are re-imported)
+SCHEMA_VERSION = "3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    link_hash TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    company TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL DEFAULT '',
+    provider TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    headline TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    sentiment TEXT,
+    sentiment_score REAL,
+    link TEXT,
+    cluster_size INTEGER NOT NULL DEFAULT 1,
+    ingested_at REAL NOT NULL,
+    UNIQUE (domain, link_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_records_domain_company_date ON records(domain, company, date);
+CREATE INDEX IF NOT EXISTS idx_records_domain_kind_date ON records(domain, kind, date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+-- Inverted company index: every company a record mentions (tagged at ingest) or was fetched for
+CREATE TABLE IF NOT EXISTS record_companies (
+    domain TEXT NOT NULL,
+    company TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (domain, company, record_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_record_companies_record ON record_companies(record_id);
+"""
+
+
+def link_hash(record: dict, key_fields: Tuple[str, ...] = ("link",)) -> str:
+    """Dedup key: hash of the record's link (headline when there is none)."""
+    parts = [str(record.get(f) or "") for f in key_fields]
+    if not parts[0]:
+        parts[0] = record.get("headline") or ""
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class RecordStore:
+    """
+    SQLite (WAL mode) store for the standardized record schema.
+    - one connection per thread; readers never block the writer
+    - records are deduplicated per domain by a hash of their link (upsert); the same article
+      ingested for two domains is stored once under each
+    - writes are batched with executemany in one transaction per batch; replace() swaps a whole kind in one
+    - reads push domain/company/kind/date-range filters and the limit down into SQL
+    - company filters go through the record_companies index filled from record["companies"]
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._conn() as conn:
+            has_meta = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'").fetchone()
+            version = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone() if has_meta else None
+            if version is None or version[0] != SCHEMA_VERSION:
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'records'").fetchone():
+                    logger.warning("Store %s has schema %s, rebuilding as %s", path, version and version[0], SCHEMA_VERSION)
+                conn.executescript("DROP TABLE IF EXISTS record_companies; DROP TABLE IF EXISTS records; DROP TABLE IF EXISTS meta;")
+            conn.executescript(SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)", (SCHEMA_VERSION,))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, domain: str, company: str, records: Iterable[dict], key_fields: Tuple[str, ...] = ("link",)) -> List[dict]:
+        """
+        Insert or refresh records; returns the ones not stored before.
+        Each record is indexed under `company` (if any) plus every name in record["companies"].
+        key_fields widens the dedup key for sources whose links are not unique per item
+        (the synthetic CSV archive reuses links across dates).
+        """
+        new: List[dict] = []
+        for batch in self._batches(records, key_fields):
+            with self._write_lock:
+                conn = self._conn()
+                with conn:
+                    new.extend(self._write_batch(conn, domain, company, batch))
+        return new
+
+    def replace(self, domain: str, kind: str, records: Iterable[dict], key_fields: Tuple[str, ...] = ("link",),
+                meta: Optional[Dict[str, str]] = None) -> int:
+        """
+        Swap every `kind` row of domain for records (written as upsert would) and set the meta entries,
+        all in one transaction: readers see the old rows until the new ones are complete, and a failed
+        import leaves them in place. Writers wait for the swap. Returns the rows written.
+        """
+        where, args = self._where(domain, kind=kind)
+        n = 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(f"DELETE FROM record_companies WHERE record_id IN (SELECT id FROM records WHERE {where})", args)
+                conn.execute(f"DELETE FROM records WHERE {where}", args)
+                for batch in self._batches(records, key_fields):
+                    n += len(self._write_batch(conn, domain, "", batch))
+                for key, value in (meta or {}).items():
+                    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                                 (key, value))
+        return n
+
+    def _batches(self, records: Iterable[dict], key_fields: Tuple[str, ...]) -> Iterator[List[Tuple[str, dict]]]:
+        batch: List[Tuple[str, dict]] = []
+        for r in records:
+            if not (r.get("link") or r.get("headline")):
+                continue
+            batch.append((link_hash(r, key_fields), r))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _write_batch(self, conn: sqlite3.Connection, domain: str, company: str, batch: List[Tuple[str, dict]]) -> List[dict]:
+        # runs inside the caller's transaction, under the write lock
+        now = time.time()
+        rows = []
+        for h, r in batch:
+            provider = r.get("provider") or ""
+            score = r.get("sentiment_score")
+            rows.append((
+                h, domain, company, PROVIDER_KINDS.get(provider, ""), provider,
+                str(r.get("date") or "")[:10], r.get("headline") or "", r.get("source"), r.get("sentiment"),
+                float(score) if score is not None else None, r.get("link"), int(r.get("cluster_size") or 1), now,
+            ))
+        hashes = [h for h, _ in batch]
+        placeholders = ",".join("?" * len(hashes))
+        existing = {row[0] for row in conn.execute(
+            f"SELECT link_hash FROM records WHERE domain = ? AND link_hash IN ({placeholders})", [domain] + hashes)}
+        conn.executemany(
+            """
+            INSERT INTO records (link_hash, domain, company, kind, provider, date, headline, source,
+                                 sentiment, sentiment_score, link, cluster_size, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(domain, link_hash) DO UPDATE SET
+                headline = excluded.headline, source = excluded.source, sentiment = excluded.sentiment,
+                sentiment_score = excluded.sentiment_score, ingested_at = excluded.ingested_at,
+                cluster_size = MAX(records.cluster_size, excluded.cluster_size)
+            """,
+            rows,
+        )
+        ids = dict(conn.execute(f"SELECT link_hash, id FROM records WHERE domain = ? AND link_hash IN ({placeholders})",
+                                [domain] + hashes).fetchall())
+        tags = set()
+        for h, r in batch:
+            rid = ids.get(h)
+            for c in ([company] if company else []) + list(r.get("companies") or []):
+                tags.add((domain, c, rid))
+        conn.executemany("INSERT OR IGNORE INTO record_companies (domain, company, record_id) VALUES (?, ?, ?)", tags)
+        seen = set()
+        new = []
+        for h, r in batch:
+            if h not in existing and h not in seen:
+                seen.add(h)
+                new.append(r)
+        return new
+
+    def add_cluster_sizes(self, domain: str, increments: Dict[str, int]) -> int:
+        """Grow the cluster_size of stored records by link_hash (near-duplicates absorbed later). Returns rows updated."""
+        if not increments:
+            return 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                cur = conn.executemany("UPDATE records SET cluster_size = cluster_size + ? WHERE domain = ? AND link_hash = ?",
+                                       [(n, domain, h) for h, n in increments.items()])
+                return cur.rowcount
+
+    @staticmethod
+    def _where(domain: str, company: str = "", kind=None, start: Optional[str] = None,
+               end: Optional[str] = None, contains: str = "") -> Tuple[str, list]:
+        clauses, args = ["domain = ?"], [domain]
+        if company:
+            clauses.append("id IN (SELECT record_id FROM record_companies WHERE domain = ? AND company = ?)")
+            args.extend([domain, company])
+        if contains:
+            # Names the entity index does not know: plain substring scan over headlines
+            clauses.append("headline LIKE ? ESCAPE '\\'")
+            args.append("%" + contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if isinstance(kind, (tuple, list)):
+            clauses.append(f"kind IN ({','.join('?' * len(kind))})")
+            args.extend(kind)
+        elif kind:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if start:
+            clauses.append("date >= ?")
+            args.append(start)
+        if end:
+            clauses.append("date <= ?")
+            args.append(end)
+        return " AND ".join(clauses), args
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> dict:
+        return {f: row[f] for f in RECORD_COLUMNS}
+
+    def query(self, domain: str, company: str = "", kind=None, limit: int = 20,
+              start: Optional[str] = None, end: Optional[str] = None, contains: str = "",
+              before: Optional[Tuple[str, int]] = None) -> List[dict]:
+        """
+        Newest-first records matching the filters, at most `limit`. kind may be a tuple of kinds.
+        before=(date, id) continues after that record (keyset pagination, no OFFSET scans).
+        """
+        where, args = self._where(domain, company, kind, start, end, contains)
+        if before is not None:
+            where += " AND (date < ? OR (date = ? AND id < ?))"
+            args += [before[0], before[0], before[1]]
+        sql = f"SELECT {', '.join(RECORD_COLUMNS)} FROM records WHERE {where} ORDER BY date DESC, id DESC LIMIT ?"
+        return [self._record(r) for r in self._conn().execute(sql, args + [max(limit, 0)])]
+
+    def sample(self, domain: str, company: str = "", kind: Optional[str] = None, limit: int = 20,
+               contains: str = "") -> List[dict]:
+        """
+        Up to `limit` random matching records, newest first. Each pick is a random point in the rowid
+        range and the first match at or after it, so no per-call sort of the matching rows; when the
+        probes come up short (few matches) the rest are taken in id order.
+        """
+        if limit <= 0:
+            return []
+        where, args = self._where(domain, company, kind, contains=contains)
+        conn = self._conn()
+        lo, hi = conn.execute("SELECT MIN(id), MAX(id) FROM records").fetchone()
+        if lo is None:
+            return []
+        probe = f"SELECT id FROM records WHERE {where} AND id >= ? ORDER BY id LIMIT 1"
+        ids = set()
+        for _ in range(limit * 3):
+            if len(ids) >= limit:
+                break
+            row = conn.execute(probe, args + [random.randint(lo, hi)]).fetchone()
+            if row:
+                ids.add(row[0])
+        if len(ids) < limit:
+            marks = ", ".join("?" * len(ids))
+            rest = conn.execute(f"SELECT id FROM records WHERE {where}" + (f" AND id NOT IN ({marks})" if ids else "")
+                                + " ORDER BY id LIMIT ?", args + list(ids) + [limit - len(ids)])
+            ids.update(r[0] for r in rest)
+        if not ids:
+            return []
+        sql = (f"SELECT {', '.join(RECORD_COLUMNS)} FROM records WHERE id IN ({', '.join('?' * len(ids))}) "
+               f"ORDER BY date DESC, id DESC")
+        return [self._record(r) for r in conn.execute(sql, list(ids))]
+
+    def series(self, domain: str, company: str = "", start: Optional[str] = None, end: Optional[str] = None,
+               contains: str = "", daily: bool = False) -> List[Tuple[str, float]]:
+        """Date-ordered (date, sentiment_score) pairs; with daily, one mean score per date."""
+        where, args = self._where(domain, company, None, start, end, contains)
+        if daily:
+            sql = (f"SELECT date, AVG(COALESCE(sentiment_score, 0.0)) FROM records WHERE {where} AND date != '' "
+                   f"GROUP BY date ORDER BY date")
+        else:
+            sql = f"SELECT date, COALESCE(sentiment_score, 0.0) FROM records WHERE {where} AND date != '' ORDER BY date"
+        return [(r[0], r[1]) for r in self._conn().execute(sql, args)]
+
+    def delete(self, domain: str, kind: Optional[str] = None) -> int:
+        where, args = self._where(domain, kind=kind)
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(f"DELETE FROM record_companies WHERE record_id IN (SELECT id FROM records WHERE {where})", args)
+                return conn.execute(f"DELETE FROM records WHERE {where}", args).rowcount
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._conn()
+        kinds = {r[0] or "unknown": r[1] for r in conn.execute("SELECT kind, COUNT(*) FROM records GROUP BY kind")}
+        return {"records": sum(kinds.values()), "by_kind": kinds}
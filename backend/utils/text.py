@@ -0,0 +1,15 @@
+import re
+from typing import FrozenSet, List
+
+# Headline normalization shared by the near-duplicate and relevance filters, so both see the same words
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Trailing publisher attributions: "... - Reuters", "... | CNBC", "... — The Verge"
+_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+STOP_WORDS = frozenset("a an and the of to in on for at by with from as is are be its it this that new".split())
+
+
+def normalize_words(text: str, stop: FrozenSet[str] = STOP_WORDS) -> List[str]:
+    """Lowercased words of a headline without its publisher suffix, stop words or plural 's'."""
+    return [w[:-1] if len(w) > 3 and w.endswith("s") else w
+            for w in _WORD_RE.findall(_SUFFIX_RE.sub("", text or "").lower()) if w not in stop]
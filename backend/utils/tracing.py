@@ -0,0 +1,217 @@
+import os
+import io
+import json
+import time
+import random
+import pstats
+import cProfile
+import logging
+import asyncio
+import threading
+import itertools
+import functools
+import contextvars
+from collections import deque
+from urllib.parse import parse_qsl
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger("tracing")
+
+# Request-scoped spans. The middleware opens a Trace per HTTP request and parks it in a context
+# variable; span() appends to whatever trace is current and is a no-op outside a request.
+# Requests slower than SLOW_REQUEST_MS are logged as one JSON timeline and kept for /api/debug/slow.
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_TRACE_BUFFER = int(os.getenv("SLOW_TRACE_BUFFER", "50"))
+# Long-lived responses (SSE) would always look slow
+SLOW_TRACE_EXCLUDE = tuple(p for p in os.getenv("SLOW_TRACE_EXCLUDE", "/api/stream,/api/insights/stream").split(",") if p)
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+# Fraction of requests whose (sync) handler runs under cProfile; 0 disables profiling
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))
+
+_ids = itertools.count(1)
+
+
+def _query_keys(query_string: bytes) -> str:
+    """Query parameter names only; values (tokens, search terms) never reach logs or /api/debug/slow."""
+    return "&".join(k for k, _ in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+
+
+class Trace:
+    def __init__(self, method: str, path: str, query: str = "", profile: bool = False):
+        self.id = f"{os.getpid():x}-{next(_ids):x}"
+        self.method, self.path, self.query = method, path, query
+        self.t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[dict] = []
+        self.dropped = 0
+        self.profile = profile
+        self.profile_stats: Optional[List[dict]] = None
+        self.finished = False
+
+    def add(self, span: dict) -> None:
+        # list.append is atomic, so worker threads can record into the same trace without a lock
+        if self.finished:
+            return
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def ms_since_start(self, t: float) -> float:
+        return round((t - self.t0) * 1000, 2)
+
+    def timeline(self, status: int, ttfb_ms: float, total_ms: float) -> dict:
+        out = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": status,
+            "started_at": round(self.started_at, 3),
+            "ttfb_ms": ttfb_ms,
+            "ms": total_ms,
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+        }
+        if self.dropped:
+            out["dropped_spans"] = self.dropped
+        if self.profile_stats is not None:
+            out["profile"] = self.profile_stats
+        return out
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("span_parent", default=None)
+_span_ids = itertools.count(1)
+
+_slow: deque = deque(maxlen=SLOW_TRACE_BUFFER)
+_slow_lock = threading.Lock()
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time the enclosed block as a child of the current span. Yields the span's attribute dict so
+    the block can add what it learns (engine, status, counts). Outside a request it does nothing.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield attrs
+        return
+    sid = next(_span_ids)
+    parent = _parent.get()
+    token = _parent.set(sid)
+    t0 = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _parent.reset(token)
+        t1 = time.perf_counter()
+        trace.add({"id": sid, "parent": parent, "name": name, "start_ms": trace.ms_since_start(t0),
+                   "ms": round((t1 - t0) * 1000, 2), "thread": threading.current_thread().name, **attrs})
+
+
+def propagate(fn: Callable) -> Callable:
+    """fn bound to a copy of the caller's context, so spans it opens on a pool thread join the caller's trace."""
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn)
+
+
+def _profile_summary(prof: cProfile.Profile, top: int = PROFILE_TOP) -> List[dict]:
+    stats = pstats.Stats(prof, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(filename)}:{line}({func})", "calls": nc,
+                     "self_ms": round(tt * 1000, 2), "cumulative_ms": round(ct * 1000, 2)})
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def _profiled(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        trace = _trace.get()
+        if trace is None or not trace.profile:
+            return endpoint(*args, **kwargs)
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(endpoint, *args, **kwargs)
+        finally:
+            trace.profile_stats = _profile_summary(prof)
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """
+    Route class that runs sampled requests' sync handlers under cProfile. cProfile follows one
+    thread, and sync handlers run on a threadpool thread, so the profiler is started there rather
+    than in the middleware. Async handlers are left alone.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if PROFILE_SAMPLE_RATE > 0 and not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _record_slow(timeline: dict) -> None:
+    with _slow_lock:
+        _slow.append(timeline)
+    logger.warning("Slow request %s %s %.0fms: %s", timeline["method"], timeline["path"], timeline["ms"],
+                   json.dumps(timeline, separators=(",", ":"), default=str))
+
+
+def slow_requests(limit: Optional[int] = None) -> List[dict]:
+    """Most recent slow-request timelines, newest first."""
+    with _slow_lock:
+        items = list(_slow)
+    items.reverse()
+    return items[:limit] if limit else items
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware opening a Trace per HTTP request. The trace id is returned in X-Trace-Id;
+    requests at or over SLOW_REQUEST_MS (to the last body byte) are recorded with their spans.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        path = scope.get("path", "")
+        trace = Trace(scope.get("method", ""), path, _query_keys(scope.get("query_string", b"")),
+                      profile=PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+        state = {"status": 500, "ttfb": None}
+        token = _trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["ttfb"] = time.perf_counter()
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.id.encode("ascii"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            end = time.perf_counter()
+            trace.finished = True
+            total_ms = trace.ms_since_start(end)
+            if total_ms >= SLOW_REQUEST_MS and not path.startswith(SLOW_TRACE_EXCLUDE):
+                _record_slow(trace.timeline(state["status"], trace.ms_since_start(state["ttfb"] or end), total_ms))
@@ -25,8 +25,26 @@ const App = (() => {
     qsa('.nav-link').forEach(a => a.classList.toggle('active', a.dataset.page === page));
   }
 
+  function subscribeFeed(onRecords){
+    // Live deltas for the current domain replace re-polling /api/news and /api/social
+    if(state.feed) state.feed.close();
+    const es = new EventSource(`${state.apiBase}/api/stream?domain=${state.domain}`);
+    state.feed = es;
+    es.addEventListener('records', e => onRecords(JSON.parse(e.data).items || []));
+    // Deltas were dropped for this client: redraw from the list endpoints
+    es.addEventListener('reset', () => navigate(state.page));
+  }
+
+  function prependItems(list, items, render, max){
+    if(!list || !items.length) return;
+    list.insertAdjacentHTML('afterbegin', items.map(render).join(''));
+    while(list.children.length > max) list.removeChild(list.lastElementChild);
+  }
+
   function navigate(page){
     if(!state.pages.includes(page)) page = 'dashboard';
+    state.page = page;
+    if(state.feed){ state.feed.close(); state.feed = null; }
     setActive(page);
     if(page === 'dashboard') renderDashboard();
     if(page === 'domains') renderDomains();
@@ -73,11 +91,16 @@ const App = (() => {
     });
   }
 
+  function section(dash, name){
+    // Dashboard sections fail independently; a failed one renders as empty
+    const s = dash?.sections?.[name];
+    return s && s.ok ? s.data : null;
+  }
+
   async function renderDashboard(){
-    // Fetch competitors and CSV sample
-    const comps = await fetchJSON(`/api/competitors?domain=${state.domain}`);
-    state.competitors = comps.competitors || [];
-    const sample = await fetchJSON(`/api/csv-sample?domain=${state.domain}`);
+    // One round trip: competitors and feeds are computed concurrently server-side
+    const dash = await fetchJSON(`/api/dashboard?domain=${state.domain}&sections=competitors,news,social&limit=10`);
+    state.competitors = section(dash, 'competitors') || [];
 
     const content = qs('#content');
     content.innerHTML = '';
@@ -118,31 +141,49 @@ const App = (() => {
     content.appendChild(socialCard);
 
     // Populate feeds
-    const news = await fetchJSON(`/api/news?domain=${state.domain}&limit=10`);
-    const social = await fetchJSON(`/api/social?domain=${state.domain}&limit=10`);
+    const news = section(dash, 'news') || {};
+    const social = section(dash, 'social') || {};
     const newsList = qs('#dashNews'); newsList.innerHTML = (news.items||[]).map(i => `<li>• ${i.headline} <small>(${i.source||'-'})</small></li>`).join('');
     const socialList = qs('#dashSocial'); socialList.innerHTML = (social.items||[]).map(i => `<li>• ${i.headline} <small>(${i.source||'-'})</small></li>`).join('');
+
+    const feedItem = i => `<li>• ${i.headline} <small>(${i.source||'-'})</small></li>`;
+    subscribeFeed(items => {
+      prependItems(newsList, items.filter(i => i.kind === 'news'), feedItem, 10);
+      prependItems(socialList, items.filter(i => i.kind === 'social'), feedItem, 10);
+    });
+  }
+
+  function streamInsights(name){
+    // Insights arrive over SSE: a meta event with KPIs, then text tokens as they are generated
+    if(state.insightStream) state.insightStream.close();
+    qs('#insightTitle').textContent = `${name}`;
+    qs('#aiInsights').textContent = '';
+    qs('#insightKPIs').innerHTML = 'Avg Sentiment: ...';
+    const es = new EventSource(`${state.apiBase}/api/insights/stream?company=${encodeURIComponent(name)}&domain=${state.domain}`);
+    state.insightStream = es;
+    es.addEventListener('meta', e => {
+      const meta = JSON.parse(e.data);
+      qs('#insightKPIs').innerHTML = `Avg Sentiment: ${meta?.sentiment_summary?.average ?? 0}`;
+    });
+    es.addEventListener('token', e => { qs('#aiInsights').textContent += JSON.parse(e.data).text; });
+    es.addEventListener('done', () => es.close());
+    es.onerror = () => es.close();
   }
 
   async function openCompetitor(name){
     // Load insights
-    const data = await fetchJSON(`/api/insights?company=${encodeURIComponent(name)}&domain=${state.domain}`);
-    qs('#insightTitle').textContent = `${name}`;
-    qs('#aiInsights').textContent = data.insights || '';
-    // KPIs
-    qs('#insightKPIs').innerHTML = `Avg Sentiment: ${data?.sentiment_summary?.average ?? 0}`;
+    streamInsights(name);
+    openInsightModal();
 
-    // Forecast tab
-    const fc = await fetchJSON(`/api/forecast?company=${encodeURIComponent(name)}&days=30`);
+    // Forecast tab and News & Social lists in one round trip
+    const dash = await fetchJSON(`/api/dashboard?domain=${state.domain}&company=${encodeURIComponent(name)}&sections=forecast,news,social&limit=10&days=30`);
+    const fc = section(dash, 'forecast') || {};
     renderForecastChart(fc.forecast || []);
 
-    // News & Social lists
-    const news = await fetchJSON(`/api/news?company=${encodeURIComponent(name)}&domain=${state.domain}&limit=10`);
-    const social = await fetchJSON(`/api/social?company=${encodeURIComponent(name)}&domain=${state.domain}&limit=10`);
+    const news = section(dash, 'news') || {};
+    const social = section(dash, 'social') || {};
     qs('#newsList').innerHTML = (news.items||[]).map(i => `<li>• <a target="_blank" href="${i.link}">${i.headline}</a></li>`).join('');
     qs('#socialList').innerHTML = (social.items||[]).map(i => `<li>• ${i.headline}</li>`).join('');
-
-    openInsightModal();
   }
 
   function renderForecastChart(points){
@@ -208,13 +249,16 @@ const App = (() => {
   async function renderSocial(){
     const content = qs('#content');
     const data = await fetchJSON(`/api/social?domain=${state.domain}&limit=20`);
-    content.innerHTML = `<h2>Social</h2><div class="card"><ul class="list">${(data.items||[]).map(i=>`<li>${i.headline}</li>`).join('')}</ul></div>`;
+    content.innerHTML = `<h2>Social</h2><div class="card"><ul class="list" id="socialFeed">${(data.items||[]).map(i=>`<li>${i.headline}</li>`).join('')}</ul></div>`;
+    subscribeFeed(items => prependItems(qs('#socialFeed'), items.filter(i => i.kind === 'social'), i => `<li>${i.headline}</li>`, 20));
   }
 
   async function renderNews(){
     const content = qs('#content');
     const data = await fetchJSON(`/api/news?domain=${state.domain}&limit=20`);
-    content.innerHTML = `<h2>News</h2><div class="card"><ul class="list">${(data.items||[]).map(i=>`<li><a target="_blank" href="${i.link}">${i.headline}</a> <small>${i.source||'-'}</small></li>`).join('')}</ul></div>`;
+    const newsItem = i => `<li><a target="_blank" href="${i.link}">${i.headline}</a> <small>${i.source||'-'}</small></li>`;
+    content.innerHTML = `<h2>News</h2><div class="card"><ul class="list" id="newsFeed">${(data.items||[]).map(newsItem).join('')}</ul></div>`;
+    subscribeFeed(items => prependItems(qs('#newsFeed'), items.filter(i => i.kind === 'news'), newsItem, 20));
   }
 
   function renderSettings(){
@@ -228,9 +272,18 @@ const App = (() => {
         <button class="btn" id="regen">Regenerate CSVs</button>
       </div>
     `;
-    qs('#regen').addEventListener('click', async ()=>{
+    qs('#regen').addEventListener('click', async (e)=>{
+      const btn = e.currentTarget;
+      btn.disabled = true; btn.textContent = 'Regenerating...';
       await fetch(`${state.apiBase}/api/regenerate-csvs`, { method: 'POST' });
-      alert('CSVs regenerated.');
+      // the job runs in the background; poll until it finishes
+      let job = {state: 'running'};
+      while(job.state === 'running'){
+        await new Promise(r => setTimeout(r, 1000));
+        job = await fetchJSON(`/api/regenerate-csvs`);
+      }
+      btn.disabled = false; btn.textContent = 'Regenerate CSVs';
+      alert(job.state === 'done' ? `CSVs regenerated in ${job.seconds}s.` : `CSV regeneration failed${job.error ? ': ' + job.error : ''}.`);
     });
   }
 